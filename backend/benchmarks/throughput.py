@@ -0,0 +1,133 @@
+"""
+Throughput benchmark for the hot endpoints
+
+Fires requests at a running API from many concurrent clients and reports
+requests/second and latency percentiles per endpoint and concurrency level.
+Pass --compare-url to benchmark a second deployment (e.g. the previous release
+with sync routes) with the same load and print both side by side.
+
+Usage (from backend/):
+    uvicorn main:app --port 8000
+    python benchmarks/throughput.py --base-url http://localhost:8000 \\
+        --professional-id 1 --service-id 1 --vendor-id 1 --category-slug hair \\
+        --date 2026-10-19 --concurrency 10 100 400 --requests 2000
+
+--token (a professional's access token) adds the calendar endpoint. Booking
+creation is left out on purpose: repeated POSTs would mostly measure the
+"slot no longer available" path.
+
+Requires httpx (pip install httpx); the API itself doesn't need it.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, timedelta
+
+import httpx
+
+def build_endpoints(args) -> dict:
+    """Endpoint name -> path (with query string)"""
+    start = date.fromisoformat(args.date)
+    endpoints = {
+        "slots": (
+            f"/api/availability/slots?professional_id={args.professional_id}"
+            f"&service_id={args.service_id}&date={start}"
+        ),
+        "slots_range": (
+            f"/api/availability/slots/range?professional_id={args.professional_id}"
+            f"&service_id={args.service_id}&start_date={start}&end_date={start + timedelta(days=6)}"
+        ),
+        "vendors": "/api/vendors/?limit=50",
+    }
+    if args.category_slug:
+        endpoints["next_available"] = (
+            f"/api/availability/next-available?vendor_id={args.vendor_id}"
+            f"&category_slug={args.category_slug}&start_date={start}"
+        )
+    if args.token:
+        endpoints["calendar"] = f"/api/bookings/calendar/me?date={start}"
+    return endpoints
+
+async def run_load(client: httpx.AsyncClient, path: str, concurrency: int, total: int, headers: dict) -> dict:
+    """Send `total` GETs from `concurrency` workers; return throughput and latency stats"""
+    latencies = []
+    errors = 0
+    pending = iter(range(total))  # Shared, so each request is claimed by exactly one worker
+
+    async def worker():
+        nonlocal errors
+        for _ in pending:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path, headers=headers)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "rps": total / elapsed,
+        "p50": cuts[49] * 1000,
+        "p95": cuts[94] * 1000,
+        "p99": cuts[98] * 1000,
+        "errors": errors
+    }
+
+async def benchmark(base_url: str, args) -> dict:
+    """Results keyed by (endpoint, concurrency)"""
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    results = {}
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        for name, path in build_endpoints(args).items():
+            # Warm connection pools and in-process caches before measuring
+            if args.warmup:
+                await run_load(client, path, min(10, args.warmup), args.warmup, headers)
+            for concurrency in args.concurrency:
+                results[(name, concurrency)] = await run_load(client, path, concurrency, args.requests, headers)
+    return results
+
+def print_results(targets: dict):
+    """One row per endpoint/concurrency/target"""
+    print(f"{'endpoint':<16}{'conc':>6}  {'target':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    first = next(iter(targets.values()))
+    for key in first:
+        name, concurrency = key
+        for label, results in targets.items():
+            r = results[key]
+            print(
+                f"{name:<16}{concurrency:>6}  {label:<10}{r['rps']:>10.1f}{r['p50']:>10.1f}"
+                f"{r['p95']:>10.1f}{r['p99']:>10.1f}{r['errors']:>8}"
+            )
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent throughput benchmark for the hot endpoints")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--compare-url", help="Second deployment to run the same load against")
+    parser.add_argument("--professional-id", type=int, required=True)
+    parser.add_argument("--service-id", type=int, required=True)
+    parser.add_argument("--vendor-id", type=int, default=1)
+    parser.add_argument("--category-slug", help="Adds /availability/next-available")
+    parser.add_argument("--date", default=date.today().isoformat(), help="First date for slot/calendar queries")
+    parser.add_argument("--token", help="Professional's access token (adds the calendar endpoint)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 400])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    targets = {"base": await benchmark(args.base_url, args)}
+    if args.compare_url:
+        targets["compare"] = await benchmark(args.compare_url, args)
+
+    print_results(targets)
+
+if __name__ == "__main__":
+    asyncio.run(main())
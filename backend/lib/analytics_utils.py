@@ -0,0 +1,295 @@
+"""
+Helpers for maintaining and reading the revenue rollup, and exporting booking facts
+"""
+import csv
+import io
+from datetime import date, timedelta
+from typing import Iterator, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, select, text
+from sqlalchemy.exc import IntegrityError
+from lib.models.analytics import DailyRevenueRollup
+from lib.models.booking import Booking
+from lib.models.professional import Professional
+from lib.models.vendor import Vendor
+
+# Second key of the vendor's rollup advisory lock (the booking day lock uses
+# positive date ordinals there)
+ROLLUP_LOCK_KEY = -1
+
+def lock_vendor_rollup(vendor_id: int, exclusive: bool, db: Session):
+    """
+    Serialize a rebuild of a vendor's rollup against incremental updates
+    
+    Held until the current transaction ends. Incremental updates take the lock
+    shared, so they don't wait for each other; a rebuild takes it exclusively,
+    so it neither misses nor double-counts a booking completed while it runs.
+    PostgreSQL uses a transaction-scoped advisory lock; other databases lock
+    the vendor row (SQLite's write lock already serializes the two).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        lock = "pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared"
+        db.execute(
+            text(f"SELECT {lock}(:vendor_id, :key)"),
+            {"vendor_id": vendor_id, "key": ROLLUP_LOCK_KEY}
+        )
+        return
+    
+    db.query(Vendor.id).filter(Vendor.id == vendor_id).with_for_update().first()
+
+def apply_revenue_rollup(booking: Booking, sign: int, db: Session):
+    """
+    Add (sign=1) or remove (sign=-1) a booking's revenue from the daily rollup
+    
+    Call in the same transaction as the status change that moves the booking
+    to or from 'completed'; the caller commits.
+    """
+    vendor_id = db.query(Professional.vendor_id).filter(
+        Professional.id == booking.professional_id
+    ).scalar()
+    if vendor_id is None:
+        return
+    
+    lock_vendor_rollup(vendor_id, False, db)
+    
+    def add_to_existing_row():
+        return db.query(DailyRevenueRollup).filter(
+            DailyRevenueRollup.vendor_id == vendor_id,
+            DailyRevenueRollup.professional_id == booking.professional_id,
+            DailyRevenueRollup.service_id == booking.service_id,
+            DailyRevenueRollup.date == booking.booking_date
+        ).update({
+            DailyRevenueRollup.revenue: DailyRevenueRollup.revenue + sign * booking.price,
+            DailyRevenueRollup.booking_count: DailyRevenueRollup.booking_count + sign
+        }, synchronize_session=False)
+    
+    if add_to_existing_row():
+        return
+    
+    # First completed booking for this key: insert (another request may win the race)
+    try:
+        with db.begin_nested():
+            db.add(DailyRevenueRollup(
+                vendor_id=vendor_id,
+                professional_id=booking.professional_id,
+                service_id=booking.service_id,
+                date=booking.booking_date,
+                revenue=sign * booking.price,
+                booking_count=sign
+            ))
+    except IntegrityError:
+        add_to_existing_row()
+
+def rebuild_revenue_rollup(vendor_id: int, db: Session) -> int:
+    """
+    Recompute a vendor's rollup rows from raw completed bookings
+    
+    Used to repair drift. Commits.
+    
+    Returns:
+        Number of rollup rows written
+    """
+    rows = _replace_vendor_rollup(vendor_id, db)
+    db.commit()
+    return rows
+
+def backfill_revenue_rollup(db: Session):
+    """Rebuild every vendor's rollup (data migration; the caller commits)"""
+    for (vendor_id,) in db.query(Vendor.id).order_by(Vendor.id).all():
+        _replace_vendor_rollup(vendor_id, db)
+
+def _replace_vendor_rollup(vendor_id: int, db: Session) -> int:
+    """Delete and re-aggregate a vendor's rollup rows under the exclusive rollup lock"""
+    lock_vendor_rollup(vendor_id, True, db)
+    
+    db.query(DailyRevenueRollup).filter(
+        DailyRevenueRollup.vendor_id == vendor_id
+    ).delete(synchronize_session=False)
+    
+    rows = db.query(
+        Booking.professional_id,
+        Booking.service_id,
+        Booking.booking_date,
+        func.sum(Booking.price).label('revenue'),
+        func.count(Booking.id).label('bookings')
+    ).join(
+        Professional, Professional.id == Booking.professional_id
+    ).filter(
+        Professional.vendor_id == vendor_id,
+        Booking.status == 'completed'
+    ).group_by(
+        Booking.professional_id, Booking.service_id, Booking.booking_date
+    ).all()
+    
+    db.add_all([
+        DailyRevenueRollup(
+            vendor_id=vendor_id,
+            professional_id=row.professional_id,
+            service_id=row.service_id,
+            date=row.booking_date,
+            revenue=row.revenue,
+            booking_count=row.bookings
+        )
+        for row in rows
+    ])
+    db.flush()
+    return len(rows)
+
+def get_period_bounds(today: date) -> dict:
+    """Today, the Monday-Sunday week and the calendar month containing today"""
+    week_start = today - timedelta(days=today.weekday())
+    month_start = date(today.year, today.month, 1)
+    if today.month == 12:
+        month_end = date(today.year + 1, 1, 1) - timedelta(days=1)
+    else:
+        month_end = date(today.year, today.month + 1, 1) - timedelta(days=1)
+    
+    return {
+        "today": today,
+        "week_start": week_start,
+        "week_end": week_start + timedelta(days=6),
+        "month_start": month_start,
+        "month_end": month_end
+    }
+
+def build_revenue_report(vendor_id: int, today: date, db: Session) -> dict:
+    """
+    Compute all headline revenue metrics for a vendor in one round-trip
+    
+    Completed metrics use conditional aggregation (SUM(CASE ...)) over a single
+    scan of the vendor's rollup rows; pending revenue is a scalar subquery over
+    confirmed bookings in the same SELECT.
+    """
+    periods = get_period_bounds(today)
+    rollup = DailyRevenueRollup
+    
+    def revenue_between(start: date, end: date):
+        return func.coalesce(func.sum(case(
+            (rollup.date.between(start, end), rollup.revenue),
+            else_=0.0
+        )), 0.0)
+    
+    pending_revenue = select(
+        func.coalesce(func.sum(Booking.price), 0.0)
+    ).join(
+        Professional, Professional.id == Booking.professional_id
+    ).where(
+        Professional.vendor_id == vendor_id,
+        Booking.status == 'confirmed'
+    ).scalar_subquery()
+    
+    row = db.query(
+        func.coalesce(func.sum(rollup.revenue), 0.0).label('total_revenue'),
+        func.coalesce(func.sum(rollup.booking_count), 0).label('total_bookings'),
+        revenue_between(periods["today"], periods["today"]).label('today_revenue'),
+        revenue_between(periods["week_start"], periods["week_end"]).label('week_revenue'),
+        revenue_between(periods["month_start"], periods["month_end"]).label('month_revenue'),
+        pending_revenue.label('pending_revenue')
+    ).filter(rollup.vendor_id == vendor_id).one()
+    
+    return {
+        "total_revenue": float(row.total_revenue),
+        "pending_revenue": float(row.pending_revenue),
+        "total_bookings": int(row.total_bookings),
+        "today_revenue": float(row.today_revenue),
+        "week_revenue": float(row.week_revenue),
+        "month_revenue": float(row.month_revenue),
+        "periods": periods
+    }
+
+# Column order for booking fact exports
+BOOKING_FACT_COLUMNS = [
+    "booking_id",
+    "booking_date",
+    "start_time",
+    "end_time",
+    "status",
+    "price",
+    "professional_id",
+    "service_id",
+    "customer_id",
+    "created_at",
+    "completed_at"
+]
+
+# Rows fetched from the cursor per batch while exporting
+EXPORT_BATCH_SIZE = 1000
+
+def booking_facts_query(vendor_id: int, start_date: Optional[date], end_date: Optional[date]):
+    """Core SELECT of plain booking columns for a vendor (no ORM entities)"""
+    query = select(
+        Booking.id,
+        Booking.booking_date,
+        Booking.start_time,
+        Booking.end_time,
+        Booking.status,
+        Booking.price,
+        Booking.professional_id,
+        Booking.service_id,
+        Booking.customer_id,
+        Booking.created_at,
+        Booking.completed_at
+    ).join(
+        Professional, Professional.id == Booking.professional_id
+    ).where(
+        Professional.vendor_id == vendor_id
+    ).order_by(Booking.booking_date, Booking.start_time, Booking.id)
+    
+    if start_date:
+        query = query.where(Booking.booking_date >= start_date)
+    if end_date:
+        query = query.where(Booking.booking_date <= end_date)
+    
+    return query
+
+def _iter_fact_batches(query, db: Session) -> Iterator[list]:
+    """Yield rows in batches using a server-side cursor where the driver supports it"""
+    result = db.execute(query.execution_options(stream_results=True, max_row_buffer=EXPORT_BATCH_SIZE))
+    for batch in result.partitions(EXPORT_BATCH_SIZE):
+        yield batch
+
+def _plain(value):
+    """Export-friendly scalar (enum values and ISO dates/times)"""
+    if value is None:
+        return None
+    if hasattr(value, "value"):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+def stream_booking_facts_csv(query, db: Session) -> Iterator[str]:
+    """Stream booking facts as CSV, one batch of rows per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(BOOKING_FACT_COLUMNS)
+    
+    for batch in _iter_fact_batches(query, db):
+        for row in batch:
+            writer.writerow([_plain(v) for v in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def booking_facts_to_columns(query, db: Session) -> dict:
+    """Booking facts as one list per column"""
+    columns = {name: [] for name in BOOKING_FACT_COLUMNS}
+    for batch in _iter_fact_batches(query, db):
+        for row in batch:
+            for name, value in zip(BOOKING_FACT_COLUMNS, row):
+                columns[name].append(_plain(value))
+    return columns
+
+def booking_facts_to_parquet(query, db: Session) -> bytes:
+    """Booking facts as a Parquet file"""
+    # Imported here so startup doesn't pay for pyarrow unless someone exports
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    table = pa.table(booking_facts_to_columns(query, db))
+    sink = io.BytesIO()
+    pq.write_table(table, sink)
+    return sink.getvalue()
@@ -1,3 +1,4 @@
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -8,6 +9,10 @@ from sqlalchemy.orm import Session
 from lib.config import settings
 from lib.database import get_db
 from lib.models.user import User
+from lib.models.professional import Professional
+from lib.models.vendor import Vendor
+from lib.principal_cache import Principal, get_principal_cache, load_principal
+from lib.permissions import Claims, encode_claims, decode_claims, claims_from_principal, require_professional, require_vendor
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 security = HTTPBearer()
@@ -35,31 +40,79 @@ def decode_access_token(token: str):
     except JWTError:
         return None
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+def create_user_token(user: User, db: Session) -> str:
+    """
+    Access token for a user, carrying their role/tenant claims and current token version
+
+    Call after the user's professional/vendor rows are committed, and issue a
+    new token whenever they change.
+    """
+    principal = load_principal(user.id, db)
+    return create_access_token(data=encode_claims(principal))
+
+def revoke_user_tokens(user: User):
+    """Invalidate every token issued to a user so far (takes effect on commit)"""
+    user.token_version = (user.token_version or 0) + 1
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+async def get_token_payload(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Decoded claims of the bearer token (401 if invalid or expired)"""
+    payload = decode_access_token(credentials.credentials)
+    if payload is None or payload.get("user_id") is None:
+        raise credentials_exception()
+    return payload
+
+def get_current_principal(
+    payload: dict = Depends(get_token_payload),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """
+    Resolve the bearer token to a principal, from the principal cache when possible
+
+    Plain def on purpose: a cache miss queries the sync session, so FastAPI
+    has to run this in its threadpool rather than on the event loop.
+    """
+    user_id: int = payload["user_id"]
+    token_version = payload.get("tv", 0)
+    cache = get_principal_cache()
+    principal = cache.get(user_id, token_version)
+    if principal is None:
+        loaded_at = time.time()
+        principal = load_principal(user_id, db)
+        if principal is None:
+            raise credentials_exception()
+        cache.set(principal, loaded_at)
     
-    token = credentials.credentials
-    payload = decode_access_token(token)
-    
-    if payload is None:
-        raise credentials_exception
-    
-    user_id: int = payload.get("user_id")
-    if user_id is None:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
+    # Tokens issued before the last revocation are rejected
+    if principal.token_version != token_version:
+        raise credentials_exception()
     
-    return user
+    return principal
+
+async def get_current_claims(
+    payload: dict = Depends(get_token_payload),
+    principal: Principal = Depends(get_current_principal)
+) -> Claims:
+    """
+    Role/tenant claims of the caller, for lib.permissions checks
+
+    The token version has already been checked against the (cached) principal,
+    so revoked tokens never get this far. Tokens issued before claims were
+    added fall back to the principal's values.
+    """
+    return decode_claims(payload) or claims_from_principal(principal)
+
+def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    return principal.to_user(db)
 
 async def get_current_vendor_user(current_user: User = Depends(get_current_user)):
     if current_user.user_type != "vendor":
@@ -68,3 +121,23 @@ async def get_current_vendor_user(current_user: User = Depends(get_current_user)
             detail="Only vendors can access this resource"
         )
     return current_user
+
+def current_professional(
+    claims: Claims = Depends(get_current_claims),
+    db: Session = Depends(get_db)
+) -> Professional:
+    """The caller's Professional row, fetched by primary key (404 if they have none)"""
+    professional = db.get(Professional, require_professional(claims))
+    if not professional:
+        raise HTTPException(status_code=404, detail="Professional profile not found")
+    return professional
+
+def current_vendor(
+    claims: Claims = Depends(get_current_claims),
+    db: Session = Depends(get_db)
+) -> Vendor:
+    """The vendor owned by the caller, fetched by primary key (vendor accounts only)"""
+    vendor = db.get(Vendor, require_vendor(claims))
+    if not vendor:
+        raise HTTPException(status_code=404, detail="Vendor profile not found")
+    return vendor
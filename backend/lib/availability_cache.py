@@ -0,0 +1,134 @@
+"""
+In-process cache for computed availability slots
+
+Entries are keyed by (professional_id, service duration, date) and evicted LRU.
+Write routes that change a professional's day (bookings, blockers, schedules)
+invalidate the affected entries after they commit. Each invalidation bumps the
+professional's generation; readers take the generation before loading rows and
+set() rejects the result if it has moved, so slots computed from pre-commit
+data are never stored. The cache is per process, so entries also expire after
+a short TTL to bound how long other workers serve slots from before a write.
+"""
+import time
+from collections import OrderedDict
+from datetime import date
+from threading import Lock
+from typing import Optional, Tuple
+from lib.config import settings
+
+class AvailabilityCache:
+    """LRU cache of day slots with per-professional invalidation and hit/miss counters"""
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: int = 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, slots)
+        self._keys_by_professional = {}
+        self._generations = {}  # professional_id -> invalidation count
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.rejected_sets = 0
+
+    def generation(self, professional_id: int) -> int:
+        """Current generation of a professional's entries; take it before loading rows for set()"""
+        with self._lock:
+            return self._generations.get(professional_id, 0)
+
+    def get(self, professional_id: int, duration_minutes: int, day: date) -> Optional[Tuple]:
+        """Return cached slots as a tuple of (start, end) datetimes, or None on miss"""
+        key = (professional_id, duration_minutes, day)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._entries.pop(key)
+                    self._keys_by_professional.get(professional_id, set()).discard(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, professional_id: int, duration_minutes: int, day: date, slots: Tuple, generation: int):
+        """
+        Store slots for a day, evicting the least recently used entries if full
+
+        Args:
+            generation: generation(professional_id) taken before the slots' rows were
+                        loaded; the slots are dropped if an invalidation happened since
+        """
+        key = (professional_id, duration_minutes, day)
+        with self._lock:
+            if self._generations.get(professional_id, 0) != generation:
+                self.rejected_sets += 1
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, slots)
+            self._entries.move_to_end(key)
+            self._keys_by_professional.setdefault(professional_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._keys_by_professional.get(old_key[0], set()).discard(old_key)
+                self.evictions += 1
+
+    def invalidate_day(self, professional_id: int, day: date):
+        """Drop every cached duration for one professional on one date"""
+        with self._lock:
+            self._generations[professional_id] = self._generations.get(professional_id, 0) + 1
+            keys = self._keys_by_professional.get(professional_id, set())
+            for key in [k for k in keys if k[2] == day]:
+                keys.discard(key)
+                self._entries.pop(key, None)
+                self.invalidations += 1
+
+    def invalidate_professional(self, professional_id: int):
+        """Drop every cached entry for a professional (e.g. after a schedule change)"""
+        with self._lock:
+            self._generations[professional_id] = self._generations.get(professional_id, 0) + 1
+            for key in self._keys_by_professional.pop(professional_id, set()):
+                self._entries.pop(key, None)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_professional.clear()
+            # Bump rather than reset, so reads in flight can't store their results
+            for professional_id in self._generations:
+                self._generations[professional_id] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "rejected_sets": self.rejected_sets
+            }
+
+_cache = AvailabilityCache(
+    max_entries=settings.availability_cache_size,
+    ttl_seconds=settings.availability_cache_ttl_seconds
+)
+
+def get_availability_cache():
+    """Return the active availability cache"""
+    return _cache
+
+def set_availability_cache(cache):
+    """
+    Swap in a different cache implementation
+
+    Any object exposing generation/get/set/invalidate_day/invalidate_professional/
+    clear/stats with the same signatures as AvailabilityCache can be used.
+    """
+    global _cache
+    _cache = cache
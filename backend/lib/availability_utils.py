@@ -1,10 +1,18 @@
+from collections import defaultdict
 from datetime import datetime, timedelta, date, time
-from typing import List
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
+from lib.availability_cache import get_availability_cache
 from lib.models.availability import WeeklySchedule, TimeBlocker, DayOfWeek
+from lib.models.professional import Professional
 from lib.models.service import Service
+from lib.category_registry import get_category_registry
 from lib.models.booking import Booking, BookingStatus
 
+# Candidate slots start every 15 minutes from the start of working hours
+SLOT_INTERVAL_MINUTES = 15
+
 def get_day_of_week(date_obj: date) -> DayOfWeek:
     """Convert date to DayOfWeek enum"""
     days = [
@@ -21,6 +29,211 @@ def get_day_of_week(date_obj: date) -> DayOfWeek:
 def combine_datetime(date_obj: date, time_obj: time) -> datetime:
     """Combine date and time into datetime"""
     return datetime.combine(date_obj, time_obj)
+
+def time_to_minutes(time_obj: time) -> int:
+    """Convert a time to minutes since midnight"""
+    return time_obj.hour * 60 + time_obj.minute
+
+def get_free_intervals(
+    work_start: int,
+    work_end: int,
+    busy: List[Tuple[int, int]]
+) -> List[Tuple[int, int]]:
+    """
+    Subtract busy intervals from working hours (all values in minutes of day)
+    
+    Busy intervals are sorted and merged once, so the cost is O(n log n) in the
+    number of busy intervals rather than per candidate slot.
+    
+    Returns:
+        Sorted, non-overlapping list of (start, end) free intervals
+    """
+    free = []
+    cursor = work_start
+    for busy_start, busy_end in sorted(busy):
+        if busy_end <= busy_start or busy_end <= cursor:
+            continue
+        if busy_start >= work_end:
+            break
+        if busy_start > cursor:
+            free.append((cursor, busy_start))
+        cursor = busy_end
+    if cursor < work_end:
+        free.append((cursor, work_end))
+    return free
+
+def load_availability_window(
+    professional_ids: List[int],
+    start_date: date,
+    end_date: date,
+    db: Session
+) -> dict:
+    """
+    Load schedules, blockers and bookings for several professionals over a date range
+
+    Runs one query per table regardless of how many professionals or days are requested.
+
+    Returns:
+        Dict with 'schedules' keyed by (professional_id, DayOfWeek), and 'blockers'
+        and 'bookings' keyed by (professional_id, date)
+    """
+    schedules = db.query(WeeklySchedule).filter(
+        WeeklySchedule.professional_id.in_(professional_ids)
+    ).all()
+
+    blockers = db.query(TimeBlocker).filter(
+        TimeBlocker.professional_id.in_(professional_ids),
+        TimeBlocker.date >= start_date,
+        TimeBlocker.date <= end_date,
+        TimeBlocker.deleted_at.is_(None)
+    ).all()
+
+    bookings = db.query(Booking).filter(
+        Booking.professional_id.in_(professional_ids),
+        Booking.booking_date >= start_date,
+        Booking.booking_date <= end_date,
+        Booking.status.notin_(['cancelled'])
+    ).all()
+
+    window = {
+        'schedules': {(s.professional_id, s.day_of_week): s for s in schedules},
+        'blockers': defaultdict(list),
+        'bookings': defaultdict(list)
+    }
+    for blocker in blockers:
+        window['blockers'][(blocker.professional_id, blocker.date)].append(blocker)
+    for booking in bookings:
+        window['bookings'][(booking.professional_id, booking.booking_date)].append(booking)
+
+    return window
+
+def calculate_day_slots(
+    target_date: date,
+    schedule: Optional[WeeklySchedule],
+    blockers: List[TimeBlocker],
+    bookings: List[Booking],
+    service_duration: int
+) -> List[dict]:
+    """
+    Calculate available slots for one day from already-loaded rows
+
+    Args:
+        target_date: Date to check availability
+        schedule: Weekly schedule row for the date's weekday (or None)
+        blockers: Time blockers on that date
+        bookings: Non-cancelled bookings on that date
+        service_duration: Service length in minutes
+
+    Returns:
+        List of available slots with start_time and end_time
+    """
+    # If no schedule or not available, return empty
+    if not schedule or not schedule.is_available:
+        return []
+    
+    # Check if entire day is blocked
+    for blocker in blockers:
+        if blocker.start_time is None and blocker.end_time is None:
+            return []  # All-day block
+    
+    work_start = time_to_minutes(schedule.start_time)
+    work_end = time_to_minutes(schedule.end_time)
+    
+    # Collect busy intervals (blockers + bookings) as minute-of-day pairs
+    busy = []
+    for blocker in blockers:
+        if blocker.start_time and blocker.end_time:
+            busy.append((time_to_minutes(blocker.start_time), time_to_minutes(blocker.end_time)))
+    for booking in bookings:
+        busy.append((time_to_minutes(booking.start_time), time_to_minutes(booking.end_time)))
+    
+    # Emit slots on the 15-minute grid (anchored at work start) inside each free interval
+    day_start = combine_datetime(target_date, time.min)
+    slots = []
+    for free_start, free_end in get_free_intervals(work_start, work_end, busy):
+        offset = (free_start - work_start) % SLOT_INTERVAL_MINUTES
+        slot_start = free_start if offset == 0 else free_start + SLOT_INTERVAL_MINUTES - offset
+        
+        # Booking must be able to complete within the free interval
+        while slot_start + service_duration <= free_end:
+            slots.append({
+                'start_time': day_start + timedelta(minutes=slot_start),
+                'end_time': day_start + timedelta(minutes=slot_start + service_duration)
+            })
+            slot_start += SLOT_INTERVAL_MINUTES
+    
+    return slots
+
+def calculate_available_slots_range(
+    professional_id: int,
+    service_id: int,
+    start_date: date,
+    end_date: date,
+    db: Session
+) -> Dict[date, List[dict]]:
+    """
+    Calculate available time slots for a professional on every date in a range
+    
+    Args:
+        professional_id: Professional ID
+        service_id: Service ID (to get duration)
+        start_date: First date to check (inclusive)
+        end_date: Last date to check (inclusive)
+        db: Database session
+        
+    Returns:
+        Dict mapping each date to its list of available slots
+    """
+    
+    # 1. Get service duration
+    service = db.query(Service).filter(Service.id == service_id).first()
+    if not service:
+        return {}
+    
+    # 2. Serve days that are already cached
+    cache = get_availability_cache()
+    duration = service.duration_minutes
+    result = {}
+    missing_dates = []
+    current_date = start_date
+    while current_date <= end_date:
+        cached = cache.get(professional_id, duration, current_date)
+        if cached is None:
+            missing_dates.append(current_date)
+        else:
+            result[current_date] = [
+                {'start_time': slot_start, 'end_time': slot_end}
+                for slot_start, slot_end in cached
+            ]
+        current_date += timedelta(days=1)
+    
+    if not missing_dates:
+        return result
+    
+    # 3. Load schedules, blockers and bookings once for the uncached span
+    generation = cache.generation(professional_id)
+    window = load_availability_window([professional_id], missing_dates[0], missing_dates[-1], db)
+    
+    # 4. Compute the missing days from the loaded rows and cache them
+    for current_date in missing_dates:
+        slots = calculate_day_slots(
+            current_date,
+            window['schedules'].get((professional_id, get_day_of_week(current_date))),
+            window['blockers'].get((professional_id, current_date), []),
+            window['bookings'].get((professional_id, current_date), []),
+            duration
+        )
+        cache.set(
+            professional_id,
+            duration,
+            current_date,
+            tuple((slot['start_time'], slot['end_time']) for slot in slots),
+            generation
+        )
+        result[current_date] = slots
+    
+    return result
+
 def calculate_available_slots(
     professional_id: int,
     service_id: int,
@@ -39,89 +252,152 @@ def calculate_available_slots(
     Returns:
         List of available slots with start_time and end_time
     """
+    slots_by_date = calculate_available_slots_range(
+        professional_id, service_id, target_date, target_date, db
+    )
+    return slots_by_date.get(target_date, [])
+
+def is_slot_available(
+    professional_id: int,
+    target_date: date,
+    start_time: time,
+    service_duration: int,
+    db: Session
+) -> bool:
+    """
+    Check a single requested slot without generating the day's slot list
     
-    # 1. Get service duration
-    service = db.query(Service).filter(Service.id == service_id).first()
-    if not service:
-        return []
-    
-    service_duration = service.duration_minutes
-    # REMOVED: buffer_minutes = 15
-    
-    # 2. Get weekly schedule for this day
-    day_of_week = get_day_of_week(target_date)
+    The slot must sit on the 15-minute grid inside working hours and must not
+    overlap any blocker or non-cancelled booking. Blockers and bookings are
+    checked together in one EXISTS query.
+    """
     schedule = db.query(WeeklySchedule).filter(
         WeeklySchedule.professional_id == professional_id,
-        WeeklySchedule.day_of_week == day_of_week
+        WeeklySchedule.day_of_week == get_day_of_week(target_date)
     ).first()
     
-    # If no schedule or not available, return empty
     if not schedule or not schedule.is_available:
-        return []
+        return False
     
-    # 3. Get working hours for the day
-    work_start = combine_datetime(target_date, schedule.start_time)
-    work_end = combine_datetime(target_date, schedule.end_time)
+    work_start = time_to_minutes(schedule.start_time)
+    work_end = time_to_minutes(schedule.end_time)
+    slot_start = time_to_minutes(start_time)
+    slot_end = slot_start + service_duration
     
-    # 4. Get blocked times for this date
-    blockers = db.query(TimeBlocker).filter(
-        TimeBlocker.professional_id == professional_id,
-        TimeBlocker.date == target_date
-    ).all()
+    if slot_start < work_start or slot_end > work_end:
+        return False
+    if (slot_start - work_start) % SLOT_INTERVAL_MINUTES != 0 or start_time.second or start_time.microsecond:
+        return False
     
-    # 5. Check if entire day is blocked
-    for blocker in blockers:
-        if blocker.start_time is None and blocker.end_time is None:
-            return []  # All-day block
+    end_time = (combine_datetime(target_date, time.min) + timedelta(minutes=slot_end)).time()
     
-    # 6. Get existing bookings for this date (not cancelled)
-    bookings = db.query(Booking).filter(
+    booking_conflict = db.query(Booking.id).filter(
         Booking.professional_id == professional_id,
         Booking.booking_date == target_date,
-        Booking.status.notin_(['cancelled'])
-    ).all()
+        Booking.status.notin_(['cancelled']),
+        Booking.start_time < end_time,
+        Booking.end_time > start_time
+    ).exists()
     
-    # 7. Generate potential slots (no buffer between appointments)
-    slots = []
-    current_time = work_start
+    blocker_conflict = db.query(TimeBlocker.id).filter(
+        TimeBlocker.professional_id == professional_id,
+        TimeBlocker.date == target_date,
+        TimeBlocker.deleted_at.is_(None),
+        or_(
+            and_(TimeBlocker.start_time.is_(None), TimeBlocker.end_time.is_(None)),
+            and_(TimeBlocker.start_time < end_time, TimeBlocker.end_time > start_time)
+        )
+    ).exists()
     
-    # Booking must be able to complete within working hours
-    while current_time + timedelta(minutes=service_duration) <= work_end:
-        slot_end = current_time + timedelta(minutes=service_duration)
-        
-        # Check if this slot overlaps with any blocker
-        is_blocked = False
-        for blocker in blockers:
-            if blocker.start_time and blocker.end_time:
-                blocker_start = combine_datetime(target_date, blocker.start_time)
-                blocker_end = combine_datetime(target_date, blocker.end_time)
-                
-                # Check for overlap
-                if not (slot_end <= blocker_start or current_time >= blocker_end):
-                    is_blocked = True
-                    break
+    has_booking, has_blocker = db.query(booking_conflict, blocker_conflict).one()
+    return not (has_booking or has_blocker)
+
+def find_next_available_openings(
+    vendor_id: int,
+    category_slug: str,
+    start_date: date,
+    end_date: date,
+    limit: int,
+    db: Session,
+    not_before: Optional[datetime] = None
+) -> List[dict]:
+    """
+    Find the earliest openings across a vendor's team for a service category
+    
+    Loads the matching services and every professional's schedules, blockers and
+    bookings in bulk (four queries total), then walks the window day by day and
+    stops as soon as enough openings have been found.
+    
+    Args:
+        vendor_id: Vendor ID
+        category_slug: Service category slug (e.g. "nails")
+        start_date: First date to search (inclusive)
+        end_date: Last date to search (inclusive)
+        limit: Maximum number of openings to return
+        db: Database session
+        not_before: Skip slots starting before this moment (e.g. now)
         
-        # Check if this slot overlaps with any existing booking
-        if not is_blocked:
-            for booking in bookings:
-                booking_start = combine_datetime(target_date, booking.start_time)
-                booking_end = combine_datetime(target_date, booking.end_time)
-                
-                # Check for overlap
-                if not (slot_end <= booking_start or current_time >= booking_end):
-                    is_blocked = True
-                    break
+    Returns:
+        List of openings ordered by date and start time, each with the
+        professional, service and slot details
+    """
+    
+    # 1. Active services in this category offered by active professionals
+    category = get_category_registry().by_slug(category_slug)
+    if not category:
+        return []
+    
+    rows = db.query(Service, Professional).join(
+        Professional, Service.professional_id == Professional.id
+    ).filter(
+        Professional.vendor_id == vendor_id,
+        Professional.is_active == True,
+        Service.is_active == True,
+        Service.category_id == category.id
+    ).all()
+    
+    if not rows:
+        return []
+    
+    # 2. Load schedules, blockers and bookings for the whole team and window
+    professional_ids = list({professional.id for _, professional in rows})
+    window = load_availability_window(professional_ids, start_date, end_date, db)
+    
+    # 3. Collect openings day by day; later days can't beat earlier ones
+    openings = []
+    current_date = start_date
+    while current_date <= end_date and len(openings) < limit:
+        day_of_week = get_day_of_week(current_date)
+        day_openings = []
         
-        if not is_blocked:
-            slots.append({
-                'start_time': current_time,
-                'end_time': slot_end
-            })
+        for service, professional in rows:
+            slots = calculate_day_slots(
+                current_date,
+                window['schedules'].get((professional.id, day_of_week)),
+                window['blockers'].get((professional.id, current_date), []),
+                window['bookings'].get((professional.id, current_date), []),
+                service.duration_minutes
+            )
+            for slot in slots:
+                if not_before and slot['start_time'] < not_before:
+                    continue
+                day_openings.append({
+                    'professional_id': professional.id,
+                    'professional_name': professional.display_name,
+                    'service_id': service.id,
+                    'service_name': service.name,
+                    'price': service.price,
+                    'duration_minutes': service.duration_minutes,
+                    'date': current_date,
+                    'start_time': slot['start_time'],
+                    'end_time': slot['end_time']
+                })
         
-        # Move to next slot (every 15 minutes for slot generation)
-        current_time += timedelta(minutes=15)
+        day_openings.sort(key=lambda o: (o['start_time'], o['professional_id'], o['service_id']))
+        openings.extend(day_openings[:limit - len(openings)])
+        current_date += timedelta(days=1)
     
-    return slots
+    return openings
 
 def initialize_weekly_schedule(professional_id: int, db: Session):  # CHANGED: professional_id instead of vendor_id
     """
@@ -151,3 +427,4 @@ def initialize_weekly_schedule(professional_id: int, db: Session):  # CHANGED: p
         db.add(schedule)
     
     db.commit()
+    get_availability_cache().invalidate_professional(professional_id)
@@ -2,10 +2,12 @@
 """
 Helper utilities for booking operations
 """
+from datetime import date, datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, text
+from sqlalchemy.exc import IntegrityError
 from lib.models.professional import Professional
-from lib.models.booking import Booking, BookingStatus
+from lib.models.booking import Booking, BookingStatus, BookingDayLock
 
 def update_professional_booking_count(professional_id: int, db: Session):
     """
@@ -21,3 +23,35 @@ def update_professional_booking_count(professional_id: int, db: Session):
     if professional:
         professional.total_bookings = total_count
         db.commit()
+
+def lock_professional_day(professional_id: int, lock_date: date, db: Session):
+    """
+    Serialize booking writes for one professional on one date
+    
+    Held until the current transaction commits or rolls back, so the overlap
+    check and the insert that follows can't interleave with another request.
+    PostgreSQL uses a transaction-scoped advisory lock; other databases update
+    a BookingDayLock row (on SQLite this takes the database write lock).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(:professional_id, :day)"),
+            {"professional_id": professional_id, "day": lock_date.toordinal()}
+        )
+        return
+    
+    def touch_lock_row():
+        return db.query(BookingDayLock).filter(
+            BookingDayLock.professional_id == professional_id,
+            BookingDayLock.lock_date == lock_date
+        ).update({BookingDayLock.locked_at: datetime.utcnow()}, synchronize_session=False)
+    
+    if touch_lock_row():
+        return
+    
+    # First booking for this day: create the lock row (another request may win the race)
+    try:
+        with db.begin_nested():
+            db.add(BookingDayLock(professional_id=professional_id, lock_date=lock_date))
+    except IntegrityError:
+        touch_lock_row()
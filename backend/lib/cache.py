@@ -0,0 +1,333 @@
+"""
+Response cache for public read endpoints
+
+Serialized JSON bodies are cached under a key with a TTL and one or more
+tags. Write routes invalidate by tag (e.g. "vendor:12") once their
+transaction commits, so a vendor edit drops every cached page about that
+vendor without knowing the individual keys.
+
+Every invalidation also bumps the tag's generation. cached_response reads the
+generations before building a body and set() drops the body if any of them
+has moved, so a response built from pre-commit rows is never stored after
+the invalidation that should have removed it.
+
+The backend is pluggable: an in-process TTL + LRU store by default, or any
+Redis-compatible client (redis-py, or FakeRedis for local runs and tests)
+when settings.response_cache_url is set.
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Iterable, Optional
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from lib.config import settings
+from lib.database import SessionLocal
+from lib.http_cache import bytes_response
+
+PUBLIC_CACHE_CONTROL = "public, max-age=60"
+
+def vendor_tag(vendor_id: int) -> str:
+    """Tag for every cached response that depends on one vendor's data"""
+    return f"vendor:{vendor_id}"
+
+CATEGORIES_TAG = "categories"
+
+class MemoryCacheBackend:
+    """In-process cache with per-entry TTL, LRU eviction and tag invalidation"""
+
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, body, tags)
+        self._keys_by_tag = {}
+        self._generations = {}  # tag -> invalidation count
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.rejected_sets = 0
+
+    def generations(self, tags: Iterable[str]) -> tuple:
+        """Current generation of each tag; take it before building a body for set()"""
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, body: bytes, ttl: int, tags: Iterable[str] = (), generations: Optional[tuple] = None):
+        tags = tuple(tags)
+        with self._lock:
+            if generations is not None and tuple(self._generations.get(tag, 0) for tag in tags) != generations:
+                self.rejected_sets += 1
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, body, tags)
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_tags(self, *tags: str):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._drop(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+            # Bump rather than reset, so builds in flight can't store their bodies
+            for tag in self._generations:
+                self._generations[tag] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "rejected_sets": self.rejected_sets
+            }
+
+    def _drop(self, key: str):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+class RedisCacheBackend:
+    """
+    Cache stored in Redis (or anything with the same get/set/incr/delete/sadd/smembers/expire API)
+
+    Each tag is a Redis set of the keys carrying it, plus a counter holding its
+    generation. Eviction is left to Redis (TTL plus its maxmemory policy).
+    """
+
+    def __init__(self, client, prefix: str = "response-cache:"):
+        self.client = client
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.rejected_sets = 0
+
+    def generations(self, tags: Iterable[str]) -> tuple:
+        """Current generation of each tag; take it before building a body for set()"""
+        return tuple(int(self.client.get(self.prefix + "gen:" + tag) or 0) for tag in tags)
+
+    def get(self, key: str) -> Optional[bytes]:
+        body = self.client.get(self.prefix + key)
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return body
+
+    def set(self, key: str, body: bytes, ttl: int, tags: Iterable[str] = (), generations: Optional[tuple] = None):
+        tags = tuple(tags)
+        if generations is not None and self.generations(tags) != generations:
+            self.rejected_sets += 1
+            return
+
+        self.client.set(self.prefix + key, body, ex=ttl)
+        for tag in tags:
+            tag_key = self.prefix + "tag:" + tag
+            self.client.sadd(tag_key, key)
+            self.client.expire(tag_key, ttl)
+
+        # An invalidation between the check above and sadd would miss this key;
+        # once the key is in every tag set, any later one deletes it
+        if generations is not None and self.generations(tags) != generations:
+            self.client.delete(self.prefix + key)
+            self.rejected_sets += 1
+
+    def invalidate_tags(self, *tags: str):
+        for tag in tags:
+            self.client.incr(self.prefix + "gen:" + tag)
+            tag_key = self.prefix + "tag:" + tag
+            keys = [k.decode() if isinstance(k, bytes) else k for k in self.client.smembers(tag_key)]
+            if keys:
+                self.client.delete(*[self.prefix + k for k in keys])
+                self.invalidations += len(keys)
+            self.client.delete(tag_key)
+
+    def clear(self):
+        for key in list(self.client.scan_iter(self.prefix + "*")):
+            name = key.decode() if isinstance(key, bytes) else key
+            if name.startswith(self.prefix + "gen:"):
+                self.client.incr(key)  # Bump rather than reset, like the memory backend
+            else:
+                self.client.delete(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "rejected_sets": self.rejected_sets
+        }
+
+class FakeRedis:
+    """Minimal in-process stand-in for a Redis client (only what RedisCacheBackend uses)"""
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = Lock()
+
+    def _alive(self, key) -> bool:
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def get(self, key):
+        with self._lock:
+            return self._data[key] if self._alive(key) else None
+
+    def set(self, key, value, ex: Optional[int] = None):
+        with self._lock:
+            self._data[key] = value
+            if ex is None:
+                self._expires.pop(key, None)
+            else:
+                self._expires[key] = time.monotonic() + ex
+        return True
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._data[key]) + 1 if self._alive(key) else 1
+            self._data[key] = value
+            return value
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._alive(key):
+                    removed += 1
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def sadd(self, key, *members):
+        with self._lock:
+            if not self._alive(key):
+                self._data[key] = set()
+            before = len(self._data[key])
+            self._data[key].update(members)
+            return len(self._data[key]) - before
+
+    def smembers(self, key):
+        with self._lock:
+            return set(self._data[key]) if self._alive(key) else set()
+
+    def expire(self, key, seconds: int):
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def scan_iter(self, pattern: str = "*"):
+        prefix = pattern.rstrip("*")
+        with self._lock:
+            keys = [k for k in self._data if k.startswith(prefix) and self._alive(k)]
+        return iter(keys)
+
+def _create_backend():
+    url = settings.response_cache_url
+    if not url:
+        return MemoryCacheBackend(max_entries=settings.response_cache_size)
+    if url == "fake://":
+        return RedisCacheBackend(FakeRedis())
+
+    import redis  # Optional dependency, only needed for a real Redis URL
+    return RedisCacheBackend(redis.Redis.from_url(url))
+
+_cache = _create_backend()
+
+def get_response_cache():
+    """Return the active response cache backend"""
+    return _cache
+
+def set_response_cache(cache):
+    """Swap in a different backend (anything with generations/get/set/invalidate_tags/clear/stats)"""
+    global _cache
+    _cache = cache
+
+def cached_response(
+    request: Request,
+    key: str,
+    tags: Iterable[str],
+    response_type: Any,
+    build: Callable[[], Any],
+    ttl: Optional[int] = None,
+    cache_control: str = PUBLIC_CACHE_CONTROL
+) -> Response:
+    """
+    Serve a JSON response from the cache, building and storing it on a miss
+
+    Args:
+        request: Incoming request (for If-None-Match)
+        key: Cache key; must include every input the response depends on
+        tags: Invalidation tags for this entry
+        response_type: Type to serialize through, e.g. List[ServiceResponse]
+        build: Produces the payload (ORM objects, dicts or models) on a miss;
+               exceptions such as 404s propagate and nothing is cached
+        ttl: Seconds to keep the entry (defaults to settings.response_cache_ttl_seconds)
+    """
+    tags = tuple(tags)
+    body = _cache.get(key)
+    if body is None:
+        generations = _cache.generations(tags)
+        adapter = TypeAdapter(response_type)
+        body = adapter.dump_json(adapter.validate_python(build(), from_attributes=True))
+        _cache.set(key, body, ttl or settings.response_cache_ttl_seconds, tags, generations)
+
+    return bytes_response(request, body, cache_control)
+
+def invalidate_on_commit(db: Session, *tags: str):
+    """Invalidate cache tags once the session's current transaction commits"""
+    db.info.setdefault("cache_invalidations", set()).update(tags)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_invalidations(session):
+    tags = session.info.pop("cache_invalidations", None)
+    if tags:
+        _cache.invalidate_tags(*tags)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop("cache_invalidations", None)
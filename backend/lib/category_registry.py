@@ -0,0 +1,88 @@
+"""
+In-process registry of service categories
+
+Categories are a small, fixed set. They are seeded once at startup with an
+idempotent bulk insert and then held in an immutable registry, so slug/id
+lookups never need a database round-trip.
+"""
+from types import MappingProxyType
+from typing import Iterable, NamedTuple, Optional, Tuple
+from threading import Lock
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from lib.database import SessionLocal
+from lib.models.service_category import ServiceCategory
+
+# NO ICONS AT ALL
+DEFAULT_CATEGORIES = (
+    {"name": "Hair", "slug": "hair"},
+    {"name": "Nails", "slug": "nails"},
+    {"name": "Facial", "slug": "facial"},
+    {"name": "Makeup", "slug": "makeup"},
+    {"name": "Massage", "slug": "massage"},
+    {"name": "Waxing", "slug": "waxing"},
+    {"name": "Eyelashes", "slug": "eyelashes"},
+    {"name": "Eyebrows", "slug": "eyebrows"},
+)
+
+class Category(NamedTuple):
+    id: int
+    name: str
+    slug: str
+
+class CategoryRegistry:
+    """Read-only category lookups by id and slug"""
+
+    def __init__(self, categories: Iterable[Category]):
+        self.all: Tuple[Category, ...] = tuple(sorted(categories, key=lambda c: c.name))
+        self._by_id = MappingProxyType({c.id: c for c in self.all})
+        self._by_slug = MappingProxyType({c.slug: c for c in self.all})
+
+    def get(self, category_id: int) -> Optional[Category]:
+        return self._by_id.get(category_id)
+
+    def by_slug(self, slug: str) -> Optional[Category]:
+        return self._by_slug.get(slug)
+
+    def slug_for(self, category_id: Optional[int]) -> Optional[str]:
+        category = self._by_id.get(category_id)
+        return category.slug if category else None
+
+def seed_categories(db: Session):
+    """Insert any missing default categories in one statement (safe to run repeatedly)"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is not None:
+        db.execute(dialect_insert(ServiceCategory).values(list(DEFAULT_CATEGORIES)).on_conflict_do_nothing())
+    else:
+        existing = {slug for (slug,) in db.query(ServiceCategory.slug).all()}
+        missing = [c for c in DEFAULT_CATEGORIES if c["slug"] not in existing]
+        if missing:
+            db.execute(insert(ServiceCategory), missing)
+    db.commit()
+
+_registry: Optional[CategoryRegistry] = None
+_lock = Lock()
+
+def load_category_registry() -> CategoryRegistry:
+    """Seed the defaults and (re)build the registry from the database; called at startup"""
+    global _registry
+    with _lock:
+        db = SessionLocal()
+        try:
+            seed_categories(db)
+            rows = db.query(ServiceCategory.id, ServiceCategory.name, ServiceCategory.slug).all()
+        finally:
+            db.close()
+        _registry = CategoryRegistry(Category(*row) for row in rows)
+        return _registry
+
+def get_category_registry() -> CategoryRegistry:
+    """Return the registry, loading it on first use if startup hasn't"""
+    return _registry or load_category_registry()
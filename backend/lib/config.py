@@ -2,6 +2,7 @@ from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 import os
 from pathlib import Path
+from typing import Literal
 
 # Get the directory where this file is located
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -18,6 +19,8 @@ class Settings(BaseSettings):
     
     # Database - PostgreSQL only
     database_url: str
+    # Optional read replica for public read endpoints ("" = read from the primary)
+    database_replica_url: str = ""
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -25,11 +28,36 @@ class Settings(BaseSettings):
         if self.database_url.startswith("postgres://"):
             self.database_url = self.database_url.replace("postgres://", "postgresql://", 1)
             print(f"⚠️  Converted postgres:// to postgresql:// for SQLAlchemy compatibility")
+        if self.database_replica_url.startswith("postgres://"):
+            self.database_replica_url = self.database_replica_url.replace("postgres://", "postgresql://", 1)
+    
+    # Connection pool (per engine; the sync and async engines each get one)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0  # Seconds to wait for a connection before failing
+    db_pool_recycle: int = 300
+    # "always" pings on every checkout, "idle" only after db_pool_pre_ping_idle_seconds unused, "never" skips it
+    db_pool_pre_ping: Literal["always", "idle", "never"] = "idle"
+    db_pool_pre_ping_idle_seconds: int = 30
+    db_statement_timeout_ms: int = 0  # PostgreSQL statement_timeout (0 = server default)
     
     secret_key: str = "your-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 24 * 7
     
+    # Availability slot cache (entries keyed by professional/duration/date)
+    availability_cache_size: int = 5000
+    availability_cache_ttl_seconds: int = 60  # Backstop for other workers' invalidations
+    
+    # Public response cache ("" = in-process, "redis://..." = Redis, "fake://" = in-process Redis stand-in)
+    response_cache_url: str = ""
+    response_cache_size: int = 2000
+    response_cache_ttl_seconds: int = 300
+    
+    # Authenticated principal cache (token -> user, professional/vendor ids)
+    principal_cache_size: int = 10000
+    principal_cache_ttl_seconds: int = 60  # Bounds staleness in other workers unless response_cache_url is Redis
+    
     # Cloudinary settings
     cloudinary_cloud_name: str = ""
     cloudinary_api_key: str = ""
@@ -0,0 +1,46 @@
+"""
+One-off data backfills, run at startup
+
+Each backfill fills data a new column or table needs for rows that existed
+before it was added. Backfills run once per database, in order: the name is
+recorded in data_migrations in the same transaction as the backfill, so a
+failed backfill is retried on the next start, and a worker that starts while
+another is running one waits on the row and then skips it.
+"""
+from sqlalchemy.exc import IntegrityError
+from lib.database import SessionLocal
+from lib.models.data_migration import DataMigration
+from lib.analytics_utils import backfill_revenue_rollup
+from lib.rating_utils import rebuild_rating_aggregates
+from lib.search import rebuild_search_index
+from lib.vendor_cards import rebuild_vendor_cards
+
+# (name, backfill(db)) in the order they run; backfills don't commit
+DATA_MIGRATIONS = (
+    ("revenue_rollup", backfill_revenue_rollup),
+    ("rating_aggregates", rebuild_rating_aggregates),
+    ("vendor_search_documents", rebuild_search_index),
+    # Cards copy the rating aggregates, so this runs after rating_aggregates
+    ("vendor_cards", rebuild_vendor_cards),
+)
+
+def run_data_migrations():
+    """Run every backfill that hasn't been applied to this database yet"""
+    for name, backfill in DATA_MIGRATIONS:
+        db = SessionLocal()
+        try:
+            if db.get(DataMigration, name):
+                continue
+            
+            # Claim it first: a concurrent worker blocks on this row until we commit
+            db.add(DataMigration(name=name))
+            db.flush()
+            
+            backfill(db)
+            db.commit()
+            print(f"✓ Data migration applied: {name}")
+        except IntegrityError:
+            # Another worker applied it
+            db.rollback()
+        finally:
+            db.close()
@@ -1,17 +1,17 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from lib.config import settings
+from lib.db_pool import engine_options, instrument_engine
 
 print(f"Database configuration starting...")
 print(f"DATABASE_URL: {settings.database_url[:30]}...")
 
 # PostgreSQL only
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_recycle=300,
-)
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
+instrument_engine("sync", engine)
 
 print("✓ Database engine created successfully")
 
@@ -25,4 +25,124 @@ def get_db():
     finally:
         db.close()
 
+def async_database_url(url: str) -> str:
+    """The same database with an async driver: asyncpg for PostgreSQL, aiosqlite for SQLite"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        # asyncpg takes "ssl" where libpq takes "sslmode"
+        query = dict(url.query)
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        url = url.set(drivername="postgresql+asyncpg", query=query)
+    elif backend == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url.render_as_string(hide_password=False)
+
+# Async engine for async def routes (same database, separate pool)
+ASYNC_DATABASE_URL = async_database_url(settings.database_url)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, async_driver=True))
+instrument_engine("async", async_engine.sync_engine)
+
+# Sessions wrap SessionLocal's class, so its event hooks (search index, response
+# cache, principal cache) fire for async requests too
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    sync_session_class=SessionLocal.class_,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def run_in_session(db: AsyncSession, fn, *args, **kwargs):
+    """
+    Run sync ORM code (anything taking db=Session) on an async session
+
+    The function runs against the async driver without blocking the event loop
+    or a threadpool worker, so query helpers shared with sync routes are reused
+    as-is.
+    """
+    return await db.run_sync(lambda session: fn(*args, db=session, **kwargs))
+
+# ========== READ REPLICA ==========
+# Public read endpoints take get_read_db/get_async_read_db. Without
+# DATABASE_REPLICA_URL those sessions simply use the primary. Routes whose
+# results fill a cache (response cache, slot cache) stay on get_db/get_async_db:
+# invalidations fire on the primary's commit, and a refill from a lagging
+# replica would cache the old data again.
+
+def _is_write(clause) -> bool:
+    """INSERT/UPDATE/DELETE or SELECT ... FOR UPDATE"""
+    if clause is None:
+        return False
+    return clause.is_dml or getattr(clause, "_for_update_arg", None) is not None
+
+class RoutingSession(SessionLocal.class_):
+    """
+    Session that reads from the replica until it writes
+
+    The first flush or write statement pins the session to the primary for the
+    rest of its life, so a handler that writes and then reads (or reloads what
+    it just committed) sees its own writes instead of a lagging replica.
+    Subclassing SessionLocal's class keeps the search index, response cache
+    and principal cache hooks.
+    """
+
+    def __init__(self, primary: Engine, replica: Engine, **kwargs):
+        super().__init__(**kwargs)
+        self.primary_bind = primary
+        self.replica_bind = replica
+        self.pinned_to_primary = primary is replica
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+        if not self.pinned_to_primary and (self._flushing or _is_write(clause)):
+            self.pinned_to_primary = True
+        return self.primary_bind if self.pinned_to_primary else self.replica_bind
+
+if settings.database_replica_url:
+    read_engine = create_engine(settings.database_replica_url, **engine_options(settings.database_replica_url))
+    instrument_engine("replica", read_engine)
+
+    ASYNC_REPLICA_URL = async_database_url(settings.database_replica_url)
+    async_read_engine = create_async_engine(ASYNC_REPLICA_URL, **engine_options(ASYNC_REPLICA_URL, async_driver=True))
+    instrument_engine("replica_async", async_read_engine.sync_engine)
+    print("✓ Read replica configured")
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    primary=engine,
+    replica=read_engine
+)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+    primary=async_engine.sync_engine,
+    replica=async_read_engine.sync_engine
+)
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
 print("✓ Database module loaded successfully")
\ No newline at end of file
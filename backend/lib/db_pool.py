@@ -0,0 +1,236 @@
+"""
+Database connection pool configuration and telemetry
+
+Engines are built with pool options from settings (size, overflow, timeout,
+recycle, pre-ping strategy, statement timeout) and an instrumented QueuePool
+that records how long checkouts take. Counters, gauges and histograms for
+every registered engine are rendered in Prometheus text format for /metrics.
+"""
+import sys
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from lib.config import settings
+
+# Histogram bucket upper bounds in seconds (Prometheus defaults)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Cumulative-bucket latency histogram"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self._sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._counts[bisect_left(self.buckets, seconds)] += 1
+            self._sum += seconds
+
+    def snapshot(self):
+        """(cumulative counts per bucket including +Inf, sum, count)"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative = []
+        running = 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+class PoolMetrics:
+    """Counters and latency histograms for one engine's pool"""
+
+    def __init__(self):
+        self.checkout_seconds = Histogram()  # Whole checkout, including pre-ping
+        self.wait_seconds = Histogram()  # Waiting for a free connection (or opening one)
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+
+class InstrumentedPoolMixin:
+    """Times QueuePool checkouts into self.metrics (kept across pool recreation)"""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            if self.metrics is not None:
+                self.metrics.checkouts += 1
+                self.metrics.checkout_seconds.observe(time.perf_counter() - started)
+
+    def _do_get(self):
+        # QueuePool._do_get retries by calling itself; only time the outermost call
+        if sys._getframe(1).f_code.co_name == "_do_get":
+            return super()._do_get()
+
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.wait_seconds.observe(time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def engine_options(url: str, async_driver: bool = False) -> dict:
+    """
+    create_engine/create_async_engine keyword arguments from the pool settings
+
+    Args:
+        url: Database URL the engine is created for
+        async_driver: True for create_async_engine (asyncpg/aiosqlite)
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+
+    # Keep SQLAlchemy's default SQLite pools: in-memory databases live inside a
+    # single connection, and aiosqlite connections each hold a worker thread
+    if backend == "sqlite" and (async_driver or parsed.database in (None, "", ":memory:")):
+        return {}
+
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if async_driver else InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping == "always",
+    }
+
+    if backend == "postgresql" and settings.db_statement_timeout_ms > 0:
+        timeout = str(settings.db_statement_timeout_ms)
+        if async_driver:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+
+    return options
+
+def _ping_idle_connections(engine: Engine, idle_seconds: int):
+    """
+    Pre-ping only connections that sat unused in the pool for idle_seconds
+
+    Busy pools hand out connections that were used moments ago, so they skip
+    the extra round-trip that pool_pre_ping adds to every checkout. A failed
+    ping raises DisconnectionError, which makes the pool retry with a fresh
+    connection.
+    """
+    @event.listens_for(engine, "checkin")
+    def _mark_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+
+        try:
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        except Exception as e:
+            raise exc.DisconnectionError() from e
+
+_engines: Dict[str, Tuple[Engine, PoolMetrics]] = {}
+
+def instrument_engine(name: str, engine: Engine) -> PoolMetrics:
+    """
+    Attach telemetry (and the idle pre-ping strategy, if configured) to an engine
+
+    Args:
+        name: Label for /metrics (e.g. "sync", "async")
+        engine: Sync Engine (use async_engine.sync_engine for async engines)
+    """
+    metrics = PoolMetrics()
+    if isinstance(engine.pool, InstrumentedPoolMixin):
+        engine.pool.metrics = metrics
+
+    @event.listens_for(engine, "connect")
+    def _count_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(engine, "invalidate")
+    def _count_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    if settings.db_pool_pre_ping == "idle" and isinstance(engine.pool, QueuePool):
+        _ping_idle_connections(engine, settings.db_pool_pre_ping_idle_seconds)
+
+    _engines[name] = (engine, metrics)
+    return metrics
+
+def render_metrics() -> str:
+    """Pool metrics for every instrumented engine in Prometheus text format"""
+    lines = []
+
+    def family(metric: str, kind: str, help_text: str):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+
+    pools = [(name, engine.pool, metrics) for name, (engine, metrics) in _engines.items()]
+    queue_pools = [(name, pool, metrics) for name, pool, metrics in pools if isinstance(pool, QueuePool)]
+
+    gauges = (
+        ("db_pool_size", "Configured number of persistent connections", lambda pool: pool.size()),
+        ("db_pool_checked_out", "Connections currently checked out", lambda pool: pool.checkedout()),
+        ("db_pool_checked_in", "Idle connections in the pool", lambda pool: pool.checkedin()),
+        ("db_pool_overflow", "Connections open beyond pool_size", lambda pool: max(0, pool.overflow())),
+    )
+    for metric, help_text, read in gauges:
+        family(metric, "gauge", help_text)
+        for name, pool, _ in queue_pools:
+            lines.append(f'{metric}{{engine="{name}"}} {read(pool)}')
+
+    counters = (
+        ("db_pool_checkouts_total", "Connection checkouts", "checkouts"),
+        ("db_pool_connects_total", "New DBAPI connections opened", "connects"),
+        ("db_pool_invalidations_total", "Connections invalidated (e.g. failed pre-ping)", "invalidations"),
+        ("db_pool_timeouts_total", "Checkouts that gave up after pool_timeout", "timeouts"),
+    )
+    for metric, help_text, attribute in counters:
+        family(metric, "counter", help_text)
+        for name, _, metrics in pools:
+            lines.append(f'{metric}{{engine="{name}"}} {getattr(metrics, attribute)}')
+
+    histograms = (
+        ("db_pool_checkout_seconds", "Time to check out a connection, including pre-ping", "checkout_seconds"),
+        ("db_pool_wait_seconds", "Time spent waiting for a free connection or opening a new one", "wait_seconds"),
+    )
+    for metric, help_text, attribute in histograms:
+        family(metric, "histogram", help_text)
+        for name, _, metrics in pools:
+            histogram = getattr(metrics, attribute)
+            cumulative, total, count = histogram.snapshot()
+            for bound, value in zip(histogram.buckets + (float("inf"),), cumulative):
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{engine="{name}",le="{le}"}} {value}')
+            lines.append(f'{metric}_sum{{engine="{name}"}} {total:.6f}')
+            lines.append(f'{metric}_count{{engine="{name}"}} {count}')
+
+    return "\n".join(lines) + "\n"
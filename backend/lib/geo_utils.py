@@ -0,0 +1,63 @@
+"""
+Geospatial helpers for "near me" vendor discovery
+
+Vendors are bucketed into a fixed lat/lng grid (geo_cell). A radius search
+looks up the handful of cells covering the search circle's bounding box with
+an indexed equality match, then ranks the candidates by great-circle distance.
+This needs no spatial extension, so it behaves the same on PostgreSQL and SQLite.
+"""
+import math
+from typing import List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Grid cell size in degrees (~11 km north-south)
+GEO_CELL_DEGREES = 0.1
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def _cell_index(lat: float, lng: float) -> Tuple[int, int]:
+    cells_around = round(360 / GEO_CELL_DEGREES)
+    row = math.floor((lat + 90) / GEO_CELL_DEGREES)
+    col = math.floor((lng + 180) / GEO_CELL_DEGREES) % cells_around
+    return row, col
+
+def geo_cell(lat: Optional[float], lng: Optional[float]) -> Optional[str]:
+    """Grid cell key for a point, or None if the point is unknown"""
+    if lat is None or lng is None:
+        return None
+    row, col = _cell_index(lat, lng)
+    return f"{row}:{col}"
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Latitude/longitude box enclosing a search circle
+
+    Returns:
+        (min_lat, max_lat, min_lng, max_lng); longitudes may fall outside
+        [-180, 180] when the box crosses the antimeridian
+    """
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(lat))
+    d_lng = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+    return (max(-90.0, lat - d_lat), min(90.0, lat + d_lat), lng - d_lng, lng + d_lng)
+
+def cells_covering(lat: float, lng: float, radius_km: float) -> List[str]:
+    """Keys of every grid cell intersecting the search circle's bounding box"""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    cells_around = round(360 / GEO_CELL_DEGREES)
+
+    min_row, _ = _cell_index(min_lat, 0)
+    max_row, _ = _cell_index(min(max_lat, 90 - 1e-9), 0)
+    first_col = math.floor((min_lng + 180) / GEO_CELL_DEGREES)
+    last_col = math.floor((max_lng + 180) / GEO_CELL_DEGREES)
+    cols = {col % cells_around for col in range(first_col, last_col + 1)}
+
+    return [f"{row}:{col}" for row in range(min_row, max_row + 1) for col in sorted(cols)]
@@ -0,0 +1,50 @@
+"""
+HTTP conditional-request helpers (ETag / If-None-Match)
+"""
+import hashlib
+from typing import Optional
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the exact response bytes"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against an ETag (weak comparison, as RFC 9110 specifies for GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def etag_response(
+    request: Request,
+    payload: BaseModel,
+    cache_control: str = "private, no-cache",
+    etag: Optional[str] = None
+) -> Response:
+    """
+    Serialize a response model and honour If-None-Match
+
+    Returns 304 with no body when the client already has this representation,
+    otherwise the JSON body with ETag and Cache-Control headers.
+    """
+    return bytes_response(request, payload.model_dump_json().encode(), cache_control, etag)
+
+def bytes_response(
+    request: Request,
+    body: bytes,
+    cache_control: str = "private, no-cache",
+    etag: Optional[str] = None
+) -> Response:
+    """Same as etag_response for an already-serialized JSON body"""
+    etag = etag or make_etag(body)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -4,6 +4,9 @@ from lib.models.professional import Professional  # NEW
 from lib.models.professional_invite import ProfessionalInvite  # NEW
 from lib.models.service import Service, ServiceImage
 from lib.models.availability import WeeklySchedule, TimeBlocker, DayOfWeek
-from lib.models.booking import Booking, BookingStatus
+from lib.models.booking import Booking, BookingStatus, BookingDayLock
 from lib.models.review import Review
 from lib.models.service_category import ServiceCategory
+from lib.models.analytics import DailyRevenueRollup
+from lib.models.vendor_card import VendorCard
+from lib.models.data_migration import DataMigration
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey, UniqueConstraint, Index
+from datetime import datetime
+from lib.database import Base
+
+class DailyRevenueRollup(Base):
+    """
+    Completed-booking revenue per vendor/professional/service/day
+    
+    Maintained incrementally when bookings move to or from 'completed', so
+    analytics never has to re-aggregate raw bookings.
+    """
+    __tablename__ = "daily_revenue_rollup"
+    __table_args__ = (
+        UniqueConstraint("vendor_id", "professional_id", "service_id", "date", name="uq_daily_revenue_rollup"),
+        Index("ix_daily_revenue_rollup_vendor_date", "vendor_id", "date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    vendor_id = Column(Integer, ForeignKey("vendors.id"), nullable=False)
+    professional_id = Column(Integer, ForeignKey("professionals.id"), nullable=False)
+    service_id = Column(Integer, ForeignKey("services.id"), nullable=False)
+    date = Column(Date, nullable=False)
+    
+    revenue = Column(Float, nullable=False, default=0.0)
+    booking_count = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -45,7 +45,8 @@ class TimeBlocker(Base):
     end_time = Column(Time, nullable=False)
     reason = Column(String, nullable=True)  # Optional note
     
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    deleted_at = Column(DateTime, nullable=True, index=True)  # Soft delete so calendar sync can see removals
     
     # Relationship
     professional = relationship("Professional", backref="time_blockers")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Time, Enum, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Time, Enum, Float, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from lib.database import Base
@@ -13,6 +13,11 @@ class BookingStatus(str, enum.Enum):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Back keyset pagination of booking history (newest first)
+        Index("ix_bookings_customer_history", "customer_id", "booking_date", "start_time", "id"),
+        Index("ix_bookings_professional_history", "professional_id", "booking_date", "start_time", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -52,3 +57,18 @@ class Booking(Base):
     professional = relationship("Professional", back_populates="bookings")
     service = relationship("Service", backref="bookings")
     review = relationship("Review", back_populates="booking", uselist=False)
+
+class BookingDayLock(Base):
+    """
+    One row per professional/date, used to serialize booking creation
+    on databases without advisory locks (e.g. SQLite)
+    """
+    __tablename__ = "booking_day_locks"
+    __table_args__ = (
+        UniqueConstraint("professional_id", "lock_date", name="uq_booking_day_lock"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    professional_id = Column(Integer, ForeignKey("professionals.id"), nullable=False)
+    lock_date = Column(Date, nullable=False)
+    locked_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+from lib.database import Base
+
+class DataMigration(Base):
+    """
+    One row per data backfill that has run (see lib.data_migrations)
+    """
+    __tablename__ = "data_migrations"
+
+    name = Column(String, primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow)
@@ -21,6 +21,15 @@ class Professional(Base):
     rating = Column(Float, default=0.0)
     total_bookings = Column(Integer, default=0)
     
+    # Running review aggregates (maintained by lib.rating_utils)
+    rating_sum = Column(Integer, default=0, nullable=False)
+    rating_count = Column(Integer, default=0, nullable=False)
+    rating_1_count = Column(Integer, default=0, nullable=False)
+    rating_2_count = Column(Integer, default=0, nullable=False)
+    rating_3_count = Column(Integer, default=0, nullable=False)
+    rating_4_count = Column(Integer, default=0, nullable=False)
+    rating_5_count = Column(Integer, default=0, nullable=False)
+    
     # Status
     is_active = Column(Boolean, default=True)
     is_owner = Column(Boolean, default=False)  # True if this is the vendor themselves
@@ -18,4 +18,7 @@ class User(Base):
     phone = Column(String)
     user_type = Column(Enum(UserType), nullable=False)
     avatar_url = Column(String)
+    
+    # Bumped to revoke every token issued so far (tokens carry it as "tv")
+    token_version = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
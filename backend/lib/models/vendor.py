@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from lib.database import Base
 
 class Vendor(Base):
     __tablename__ = "vendors"
+    __table_args__ = (
+        # Full-text search over search_document (PostgreSQL only; see lib.search for the fallback)
+        Index(
+            "ix_vendors_search_document",
+            text("to_tsvector('simple', coalesce(search_document, ''))"),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
@@ -12,9 +20,26 @@ class Vendor(Base):
     bio = Column(String)
     location = Column(String)
     
-    # Rating is now calculated from all professionals
+    # Coordinates for "near me" discovery; geo_cell is the grid bucket (see lib.geo_utils)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geo_cell = Column(String, nullable=True, index=True)
+    
+    # Denormalized text for full-text search (maintained by lib.search)
+    search_document = Column(Text)
+    
+    # Rating is review-weighted across all professionals
     rating = Column(Float, default=0.0)
     
+    # Running review aggregates (maintained by lib.rating_utils)
+    rating_sum = Column(Integer, default=0, nullable=False)
+    rating_count = Column(Integer, default=0, nullable=False)
+    rating_1_count = Column(Integer, default=0, nullable=False)
+    rating_2_count = Column(Integer, default=0, nullable=False)
+    rating_3_count = Column(Integer, default=0, nullable=False)
+    rating_4_count = Column(Integer, default=0, nullable=False)
+    rating_5_count = Column(Integer, default=0, nullable=False)
+    
     # PRO features
     is_pro = Column(Boolean, default=False)
     pro_employee_limit = Column(Integer, default=0)  # 0 = just owner, PRO gets more
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Index
+from datetime import datetime
+from lib.database import Base
+
+class VendorCard(Base):
+    """
+    Denormalized marketplace listing row, one per vendor
+    
+    Rebuilt by lib.vendor_cards.refresh_vendor_card whenever the vendor, its
+    professionals or their services change, so listings read a single table.
+    """
+    __tablename__ = "vendor_cards"
+    __table_args__ = (
+        Index("ix_vendor_cards_active_rating", "is_active", "rating"),
+    )
+
+    vendor_id = Column(Integer, ForeignKey("vendors.id"), primary_key=True)
+    business_name = Column(String, nullable=False)
+    avatar_url = Column(String, nullable=True)
+    location = Column(String, nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geo_cell = Column(String, nullable=True, index=True)
+    
+    rating = Column(Float, nullable=False, default=0.0)
+    review_count = Column(Integer, nullable=False, default=0)
+    is_pro = Column(Boolean, nullable=False, default=False)
+    is_active = Column(Boolean, nullable=False, default=False)
+    total_professionals = Column(Integer, nullable=False, default=0)
+    
+    # Slugs of categories with an active service, delimited as ",nails,hair," so
+    # a single LIKE '%,slug,%' matches exactly one slug
+    category_slugs = Column(String, nullable=False, default=",")
+    min_price = Column(Float, nullable=True)
+    max_price = Column(Float, nullable=True)
+    
+    vendor_created_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,41 @@
+"""
+Opaque cursors for keyset pagination
+
+A cursor encodes the sort-key values of the last row on a page. The next page
+continues strictly after that row, so deep pages cost the same as the first.
+"""
+import base64
+import json
+from datetime import date, datetime, time
+from fastapi import HTTPException, status
+
+def encode_cursor(*values) -> str:
+    """Encode sort-key values (int, str, date, time, datetime) into a URL-safe cursor"""
+    raw = [v.isoformat() if isinstance(v, (date, time, datetime)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Cursor string from a previous page
+        types: Expected type of each value, in order (int, str, date, time or datetime)
+
+    Raises:
+        HTTPException 400 if the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError("wrong number of values")
+        return tuple(
+            t.fromisoformat(v) if t in (date, time, datetime) else t(v)
+            for t, v in zip(types, raw)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
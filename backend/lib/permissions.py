@@ -0,0 +1,118 @@
+"""
+Authorization from signed token claims
+
+Access tokens carry the caller's role and tenant (user_type, professional_id,
+vendor_id, is_owner) next to their token version. The checks below answer the
+common questions - "is this my professional profile?", "is this resource in my
+business?", "is this my booking?" - from those claims alone, so routes no longer
+look up Professional/Vendor by user_id just to learn who is calling.
+"""
+from typing import NamedTuple, Optional
+from fastapi import HTTPException, status
+from lib.models.user import UserType
+
+class Claims(NamedTuple):
+    user_id: int
+    user_type: UserType
+    professional_id: Optional[int]
+    vendor_id: Optional[int]  # Vendor the user works at (their own for owners)
+    is_owner: bool
+    token_version: int
+
+    @property
+    def is_staff(self) -> bool:
+        """Vendors and professionals (anyone who can have bookings and services)"""
+        return self.user_type in (UserType.VENDOR, UserType.PROFESSIONAL)
+
+def encode_claims(principal) -> dict:
+    """JWT claims for a principal (see lib.principal_cache.Principal)"""
+    return {
+        "user_id": principal.user_id,
+        "user_type": principal.user_type.value,
+        "professional_id": principal.professional_id,
+        "vendor_id": principal.vendor_id,
+        "is_owner": principal.is_owner,
+        "tv": principal.token_version
+    }
+
+def decode_claims(payload: dict) -> Optional[Claims]:
+    """Claims from a decoded token, or None for tokens issued before claims were added"""
+    try:
+        user_type = UserType(payload["user_type"])
+    except (KeyError, ValueError):
+        return None
+
+    return Claims(
+        user_id=payload["user_id"],
+        user_type=user_type,
+        professional_id=payload.get("professional_id"),
+        vendor_id=payload.get("vendor_id"),
+        is_owner=bool(payload.get("is_owner")),
+        token_version=payload.get("tv", 0)
+    )
+
+def claims_from_principal(principal) -> Claims:
+    """Claims equivalent to a principal resolved from the database"""
+    return Claims(
+        user_id=principal.user_id,
+        user_type=principal.user_type,
+        professional_id=principal.professional_id,
+        vendor_id=principal.vendor_id,
+        is_owner=principal.is_owner,
+        token_version=principal.token_version
+    )
+
+def require_staff(claims: Claims, detail: str = "Only vendors and professionals can access this endpoint"):
+    """403 unless the caller is a vendor or professional"""
+    if not claims.is_staff:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+def require_customer(claims: Claims, detail: str = "Only customers can access this endpoint"):
+    """403 unless the caller is a customer"""
+    if claims.user_type != UserType.CUSTOMER:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+def require_professional(claims: Claims) -> int:
+    """The caller's professional id (404 if they have no professional profile)"""
+    if claims.professional_id is None:
+        raise HTTPException(status_code=404, detail="Professional profile not found")
+    return claims.professional_id
+
+def require_vendor(claims: Claims, detail: str = "Only vendors can access this resource") -> int:
+    """The id of the vendor the caller owns (403 for non-vendor accounts)"""
+    if claims.user_type != UserType.VENDOR:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+    if claims.vendor_id is None:
+        raise HTTPException(status_code=404, detail="Vendor profile not found")
+    return claims.vendor_id
+
+def can_manage(claims: Claims, resource) -> bool:
+    """
+    Whether the caller may act on a professional's resource
+
+    Allowed for the professional it belongs to, and for the owner of that
+    professional's business.
+
+    Args:
+        claims: Caller's token claims
+        resource: Any row with professional_id and a professional relationship
+                  (Service, Booking, WeeklySchedule, TimeBlocker)
+    """
+    if claims.professional_id is not None and resource.professional_id == claims.professional_id:
+        return True
+    if not claims.is_owner or claims.vendor_id is None:
+        return False
+
+    # Only an owner acting on a teammate's resource needs the professional row
+    return resource.professional is not None and resource.professional.vendor_id == claims.vendor_id
+
+def authorize_manage(claims: Claims, resource, detail: str = "Not authorized"):
+    """403 unless can_manage(claims, resource)"""
+    if not can_manage(claims, resource):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+def can_access_booking(claims: Claims, booking) -> bool:
+    """Customers see their own bookings; staff see bookings they can manage"""
+    if claims.user_type == UserType.CUSTOMER:
+        return booking.customer_id == claims.user_id
+    return can_manage(claims, booking)
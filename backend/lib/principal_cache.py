@@ -0,0 +1,201 @@
+"""
+Cache of authenticated principals
+
+A principal is everything get_current_user needs to resolve a token: the
+user's column values plus their professional/vendor ids and role. Entries are
+keyed by (user_id, token_version), bounded LRU with a TTL, and dropped as soon
+as a transaction that changes the user's User, Professional or Vendor row
+commits.
+
+Each worker process keeps its own entries. When the response cache is backed
+by Redis (settings.response_cache_url), invalidations are also stamped there
+and checked on every hit, so logout-all, role changes and deletions reach all
+workers at once. Without it other workers only notice when their entry
+expires, so keep principal_cache_ttl_seconds short in multi-worker
+deployments.
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from lib.cache import get_response_cache
+from lib.config import settings
+from lib.database import SessionLocal
+from lib.models.user import User, UserType
+from lib.models.professional import Professional
+from lib.models.vendor import Vendor
+
+class Principal(NamedTuple):
+    user_id: int
+    user_type: UserType
+    token_version: int
+    professional_id: Optional[int]
+    vendor_id: Optional[int]  # Vendor the user works at (their own for owners)
+    is_owner: bool
+    user_state: dict  # Column values of the User row
+
+    def to_user(self, db: Session) -> User:
+        """
+        Rebuild the User and attach it to the session without a SELECT
+
+        The returned instance is persistent in db, so handlers can read lazy
+        relationships or modify and commit it as if it had been queried.
+        """
+        user = User(**self.user_state)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+def load_principal(user_id: int, db: Session) -> Optional[Principal]:
+    """Resolve a principal from the database (one query)"""
+    row = db.query(User, Professional.id, Professional.vendor_id, Professional.is_owner, Vendor.id).outerjoin(
+        Professional, Professional.user_id == User.id
+    ).outerjoin(
+        Vendor, Vendor.user_id == User.id
+    ).filter(User.id == user_id).first()
+    if row is None:
+        return None
+
+    user, professional_id, employer_id, is_owner, owned_vendor_id = row
+    return Principal(
+        user_id=user.id,
+        user_type=user.user_type,
+        token_version=user.token_version or 0,
+        professional_id=professional_id,
+        vendor_id=owned_vendor_id or employer_id,
+        is_owner=bool(is_owner),
+        user_state={attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    )
+
+class PrincipalCache:
+    """
+    LRU + TTL cache of principals keyed by (user_id, token_version)
+
+    invalidate_user stamps the time of the invalidation, locally and in the
+    shared store if there is one. Entries loaded before the latest stamp are
+    treated as misses, which also covers a load that raced the invalidating
+    commit and stored its (stale) result afterwards.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: int = 300, shared=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared  # Redis-compatible client (get/set), or None for this process only
+        self._entries = OrderedDict()  # (user_id, token_version) -> (expires_at, loaded_at, principal)
+        self._invalidated_at = OrderedDict()  # user_id -> wall-clock time of last invalidation
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int, token_version: int) -> Optional[Principal]:
+        key = (user_id, token_version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic() or entry[1] <= self._local_stamp(user_id):
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        # Another worker may have invalidated the user since this entry was loaded
+        if entry[1] <= self._shared_stamp(user_id):
+            with self._lock:
+                self._entries.pop(key, None)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return entry[2]
+
+    def set(self, principal: Principal, loaded_at: Optional[float] = None):
+        """
+        Store a principal
+
+        Args:
+            principal: Principal to cache
+            loaded_at: time.time() taken before the principal was read from the
+                       database (defaults to now)
+        """
+        key = (principal.user_id, principal.token_version)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, loaded_at or time.time(), principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int):
+        """Drop every cached token version of a user, in this process and (if shared) everywhere else"""
+        now = time.time()
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user_id]:
+                del self._entries[key]
+
+            # Stamps older than the TTL can only match entries that have already expired
+            self._invalidated_at.pop(user_id, None)
+            self._invalidated_at[user_id] = now
+            while self._invalidated_at and next(iter(self._invalidated_at.values())) <= now - self.ttl_seconds:
+                self._invalidated_at.popitem(last=False)
+
+        if self.shared is not None:
+            self.shared.set(self._shared_key(user_id), repr(now), ex=self.ttl_seconds)
+
+    def _local_stamp(self, user_id: int) -> float:
+        return self._invalidated_at.get(user_id, 0.0)
+
+    def _shared_stamp(self, user_id: int) -> float:
+        if self.shared is None:
+            return 0.0
+        stamp = self.shared.get(self._shared_key(user_id))
+        return float(stamp) if stamp is not None else 0.0
+
+    @staticmethod
+    def _shared_key(user_id: int) -> str:
+        return f"principal-invalidated:{user_id}"
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidated_at.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "shared_invalidation": self.shared is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+_cache = PrincipalCache(
+    max_entries=settings.principal_cache_size,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+    shared=getattr(get_response_cache(), "client", None)  # Only the Redis backend has a client
+)
+
+def get_principal_cache() -> PrincipalCache:
+    """Return the active principal cache"""
+    return _cache
+
+# Invalidate on commit whenever a flush touches a row a principal is built from
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_changed_principals(session, flush_context):
+    user_ids = session.info.setdefault("principals_changed", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            user_ids.add(obj.id)
+        elif isinstance(obj, (Professional, Vendor)):
+            user_ids.add(obj.user_id)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_changed_principals(session):
+    for user_id in session.info.pop("principals_changed", ()):
+        _cache.invalidate_user(user_id)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_changed_principals(session):
+    session.info.pop("principals_changed", None)
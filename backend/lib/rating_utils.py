@@ -0,0 +1,97 @@
+"""
+Helpers for maintaining running rating aggregates on Professional and Vendor
+"""
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, literal_column
+from lib.models.professional import Professional
+from lib.models.vendor import Vendor
+from lib.models.review import Review
+
+# Histogram column per star rating
+RATING_COUNT_COLUMNS = {
+    1: "rating_1_count",
+    2: "rating_2_count",
+    3: "rating_3_count",
+    4: "rating_4_count",
+    5: "rating_5_count",
+}
+
+def _average_expression(rating_sum, rating_count):
+    """SQL for round(sum / count, 1), or 0.0 with no reviews (float division on every backend)"""
+    return case(
+        (rating_count > 0, func.round(rating_sum * literal_column("1.0") / rating_count, 1)),
+        else_=0.0
+    )
+
+def apply_rating_change(
+    professional_id: int,
+    vendor_id: int,
+    old_rating: Optional[int],
+    new_rating: Optional[int],
+    db: Session
+):
+    """
+    Adjust the professional's and vendor's rating aggregates for one review write
+    
+    Pass old_rating=None for a new review, or both values when a rating is edited.
+    Each row is changed with a single relative UPDATE, so concurrent reviews don't
+    lose increments. The caller commits, together with the review itself.
+    """
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    
+    star_deltas = {}
+    if old_rating is not None:
+        star_deltas[old_rating] = star_deltas.get(old_rating, 0) - 1
+    if new_rating is not None:
+        star_deltas[new_rating] = star_deltas.get(new_rating, 0) + 1
+    
+    for model, row_id in ((Professional, professional_id), (Vendor, vendor_id)):
+        new_sum = model.rating_sum + sum_delta
+        new_count = model.rating_count + count_delta
+        
+        values = {
+            model.rating_sum: new_sum,
+            model.rating_count: new_count,
+            model.rating: _average_expression(new_sum, new_count)
+        }
+        for star, delta in star_deltas.items():
+            if delta:
+                column = getattr(model, RATING_COUNT_COLUMNS[star])
+                values[column] = column + delta
+        
+        db.query(model).filter(model.id == row_id).update(values, synchronize_session=False)
+
+def rebuild_rating_aggregates(db: Session):
+    """
+    Recompute every professional's and vendor's rating aggregates from reviews
+    
+    Backfills the aggregate columns (data migration) or repairs drift. The
+    caller commits.
+    """
+    rows = db.query(
+        Professional.id,
+        Professional.vendor_id,
+        Review.rating,
+        func.count(Review.id)
+    ).join(
+        Review, Review.professional_id == Professional.id
+    ).group_by(Professional.id, Professional.vendor_id, Review.rating).all()
+    
+    totals = {Professional: {}, Vendor: {}}
+    for professional_id, vendor_id, rating, count in rows:
+        for model, row_id in ((Professional, professional_id), (Vendor, vendor_id)):
+            entry = totals[model].setdefault(row_id, {star: 0 for star in RATING_COUNT_COLUMNS})
+            entry[rating] += count
+    
+    for model in (Professional, Vendor):
+        for row in db.query(model).all():
+            histogram = totals[model].get(row.id, {star: 0 for star in RATING_COUNT_COLUMNS})
+            row.rating_count = sum(histogram.values())
+            row.rating_sum = sum(star * count for star, count in histogram.items())
+            row.rating = round(row.rating_sum / row.rating_count, 1) if row.rating_count else 0.0
+            for star, column in RATING_COUNT_COLUMNS.items():
+                setattr(row, column, histogram[star])
+    
+    db.flush()
@@ -1,5 +1,6 @@
 # backend/app/api/analytics.py
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, extract
 from datetime import datetime, date, timedelta
@@ -7,9 +8,20 @@ from typing import Optional
 from lib.database import get_db
 from lib.models.user import User
 from lib.models.vendor import Vendor
-from lib.models.booking import Booking, BookingStatus
+from lib.models.booking import BookingStatus
 from lib.models.professional import Professional
+from lib.models.service import Service
+from lib.models.analytics import DailyRevenueRollup
 from lib.auth import get_current_user
+from lib.analytics_utils import (
+    rebuild_revenue_rollup,
+    build_revenue_report,
+    BOOKING_FACT_COLUMNS,
+    booking_facts_query,
+    stream_booking_facts_csv,
+    booking_facts_to_columns,
+    booking_facts_to_parquet
+)
 
 router = APIRouter( tags=["analytics"])
 
@@ -27,80 +39,25 @@ def get_revenue_summary(
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor profile not found")
     
-    # Get all professional IDs for this vendor
-    professional_ids = db.query(Professional.id).filter(
-        Professional.vendor_id == vendor.id
-    ).all()
-    professional_ids = [p[0] for p in professional_ids]
-    
-    # Total completed bookings revenue
-    total_revenue = db.query(func.sum(Booking.price)).filter(
-        Booking.professional_id.in_(professional_ids),
-        Booking.status == 'completed'
-    ).scalar() or 0.0
-    
-    # Total pending revenue (confirmed but not completed)
-    pending_revenue = db.query(func.sum(Booking.price)).filter(
-        Booking.professional_id.in_(professional_ids),
-        Booking.status == 'confirmed'
-    ).scalar() or 0.0
-    
-    # Total bookings count
-    total_bookings = db.query(func.count(Booking.id)).filter(
-        Booking.professional_id.in_(professional_ids),
-        Booking.status == 'completed'
-    ).scalar() or 0
-    
-    # Today's revenue
-    today = date.today()
-    today_revenue = db.query(func.sum(Booking.price)).filter(
-        Booking.professional_id.in_(professional_ids),
-        Booking.status == 'completed',
-        Booking.booking_date == today
-    ).scalar() or 0.0
-    
-    # This week's revenue (Monday to Sunday)
-    week_start = today - timedelta(days=today.weekday())
-    week_end = week_start + timedelta(days=6)
-    week_revenue = db.query(func.sum(Booking.price)).filter(
-        Booking.professional_id.in_(professional_ids),
-        Booking.status == 'completed',
-        Booking.booking_date >= week_start,
-        Booking.booking_date <= week_end
-    ).scalar() or 0.0
-    
-    # This month's revenue
-    month_start = date(today.year, today.month, 1)
-    if today.month == 12:
-        month_end = date(today.year + 1, 1, 1) - timedelta(days=1)
-    else:
-        month_end = date(today.year, today.month + 1, 1) - timedelta(days=1)
-    
-    month_revenue = db.query(func.sum(Booking.price)).filter(
-        Booking.professional_id.in_(professional_ids),
-        Booking.status == 'completed',
-        Booking.booking_date >= month_start,
-        Booking.booking_date <= month_end
-    ).scalar() or 0.0
+    # All headline metrics in one query
+    report = build_revenue_report(vendor.id, date.today(), db)
+    total_revenue = report["total_revenue"]
+    total_bookings = report["total_bookings"]
     
     # Average booking value
     avg_booking_value = total_revenue / total_bookings if total_bookings > 0 else 0.0
     
+    periods = report["periods"]
+    
     return {
         "total_revenue": round(total_revenue, 2),
-        "pending_revenue": round(pending_revenue, 2),
+        "pending_revenue": round(report["pending_revenue"], 2),
         "total_bookings": total_bookings,
-        "today_revenue": round(today_revenue, 2),
-        "week_revenue": round(week_revenue, 2),
-        "month_revenue": round(month_revenue, 2),
+        "today_revenue": round(report["today_revenue"], 2),
+        "week_revenue": round(report["week_revenue"], 2),
+        "month_revenue": round(report["month_revenue"], 2),
         "average_booking_value": round(avg_booking_value, 2),
-        "period": {
-            "today": today.isoformat(),
-            "week_start": week_start.isoformat(),
-            "week_end": week_end.isoformat(),
-            "month_start": month_start.isoformat(),
-            "month_end": month_end.isoformat()
-        }
+        "period": {name: value.isoformat() for name, value in periods.items()}
     }
 
 
@@ -120,23 +77,18 @@ def get_daily_revenue(
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor profile not found")
     
-    # Get all professional IDs for this vendor
-    professional_ids = db.query(Professional.id).filter(
-        Professional.vendor_id == vendor.id
-    ).all()
-    professional_ids = [p[0] for p in professional_ids]
-    
     # Query daily revenue
     daily_data = db.query(
-        Booking.booking_date,
-        func.sum(Booking.price).label('revenue'),
-        func.count(Booking.id).label('bookings')
+        DailyRevenueRollup.date.label('booking_date'),
+        func.sum(DailyRevenueRollup.revenue).label('revenue'),
+        func.sum(DailyRevenueRollup.booking_count).label('bookings')
     ).filter(
-        Booking.professional_id.in_(professional_ids),
-        Booking.status == 'completed',
-        Booking.booking_date >= start_date,
-        Booking.booking_date <= end_date
-    ).group_by(Booking.booking_date).order_by(Booking.booking_date).all()
+        DailyRevenueRollup.vendor_id == vendor.id,
+        DailyRevenueRollup.date >= start_date,
+        DailyRevenueRollup.date <= end_date
+    ).group_by(DailyRevenueRollup.date).having(
+        func.sum(DailyRevenueRollup.booking_count) > 0
+    ).order_by(DailyRevenueRollup.date).all()
     
     return {
         "start_date": start_date.isoformat(),
@@ -145,12 +97,12 @@ def get_daily_revenue(
             {
                 "date": day.booking_date.isoformat(),
                 "revenue": round(day.revenue, 2),
-                "bookings": day.bookings
+                "bookings": int(day.bookings)
             }
             for day in daily_data
         ],
         "total_revenue": round(sum(day.revenue for day in daily_data), 2),
-        "total_bookings": sum(day.bookings for day in daily_data)
+        "total_bookings": int(sum(day.bookings for day in daily_data))
     }
 
 
@@ -169,28 +121,28 @@ def get_weekly_revenue(
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor profile not found")
     
-    # Get all professional IDs for this vendor
-    professional_ids = db.query(Professional.id).filter(
-        Professional.vendor_id == vendor.id
-    ).all()
-    professional_ids = [p[0] for p in professional_ids]
-    
     today = date.today()
     start_date = today - timedelta(weeks=weeks)
     
-    # Get all completed bookings in range
-    bookings = db.query(Booking).filter(
-        Booking.professional_id.in_(professional_ids),
-        Booking.status == 'completed',
-        Booking.booking_date >= start_date,
-        Booking.booking_date <= today
-    ).all()
+    # Daily totals in range (at most one row per day)
+    daily_data = db.query(
+        DailyRevenueRollup.date,
+        func.sum(DailyRevenueRollup.revenue).label('revenue'),
+        func.sum(DailyRevenueRollup.booking_count).label('bookings')
+    ).filter(
+        DailyRevenueRollup.vendor_id == vendor.id,
+        DailyRevenueRollup.date >= start_date,
+        DailyRevenueRollup.date <= today
+    ).group_by(DailyRevenueRollup.date).all()
     
     # Group by week
     weekly_data = {}
-    for booking in bookings:
+    for day in daily_data:
+        if not day.bookings:
+            continue
+        
         # Get Monday of the week
-        week_start = booking.booking_date - timedelta(days=booking.booking_date.weekday())
+        week_start = day.date - timedelta(days=day.date.weekday())
         week_key = week_start.isoformat()
         
         if week_key not in weekly_data:
@@ -201,8 +153,8 @@ def get_weekly_revenue(
                 "bookings": 0
             }
         
-        weekly_data[week_key]["revenue"] += booking.price
-        weekly_data[week_key]["bookings"] += 1
+        weekly_data[week_key]["revenue"] += day.revenue
+        weekly_data[week_key]["bookings"] += int(day.bookings)
     
     # Sort by week
     weekly_breakdown = sorted(weekly_data.values(), key=lambda x: x["week_start"])
@@ -236,27 +188,24 @@ def get_monthly_revenue(
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor profile not found")
     
-    # Get all professional IDs for this vendor
-    professional_ids = db.query(Professional.id).filter(
-        Professional.vendor_id == vendor.id
-    ).all()
-    professional_ids = [p[0] for p in professional_ids]
-    
     # Query monthly revenue using SQL extract
+    year = extract('year', DailyRevenueRollup.date)
+    month = extract('month', DailyRevenueRollup.date)
     monthly_data = db.query(
-        extract('year', Booking.booking_date).label('year'),
-        extract('month', Booking.booking_date).label('month'),
-        func.sum(Booking.price).label('revenue'),
-        func.count(Booking.id).label('bookings')
+        year.label('year'),
+        month.label('month'),
+        func.sum(DailyRevenueRollup.revenue).label('revenue'),
+        func.sum(DailyRevenueRollup.booking_count).label('bookings')
     ).filter(
-        Booking.professional_id.in_(professional_ids),
-        Booking.status == 'completed'
+        DailyRevenueRollup.vendor_id == vendor.id
     ).group_by(
-        extract('year', Booking.booking_date),
-        extract('month', Booking.booking_date)
+        year,
+        month
+    ).having(
+        func.sum(DailyRevenueRollup.booking_count) > 0
     ).order_by(
-        extract('year', Booking.booking_date).desc(),
-        extract('month', Booking.booking_date).desc()
+        year.desc(),
+        month.desc()
     ).limit(months).all()
     
     # Format response
@@ -266,7 +215,7 @@ def get_monthly_revenue(
             "month": int(row.month),
             "month_name": date(int(row.year), int(row.month), 1).strftime("%B %Y"),
             "revenue": round(row.revenue, 2),
-            "bookings": row.bookings
+            "bookings": int(row.bookings)
         }
         for row in monthly_data
     ]
@@ -303,32 +252,32 @@ def get_revenue_by_professional(
         Professional.vendor_id == vendor.id
     ).all()
     
+    # Revenue per professional from the rollup
+    query = db.query(
+        DailyRevenueRollup.professional_id,
+        func.sum(DailyRevenueRollup.revenue).label('revenue'),
+        func.sum(DailyRevenueRollup.booking_count).label('bookings')
+    ).filter(DailyRevenueRollup.vendor_id == vendor.id)
+    
+    # Add date filters if provided
+    if start_date:
+        query = query.filter(DailyRevenueRollup.date >= start_date)
+    if end_date:
+        query = query.filter(DailyRevenueRollup.date <= end_date)
+    
+    totals = {row.professional_id: row for row in query.group_by(DailyRevenueRollup.professional_id).all()}
+    
     professional_revenue = []
     
     for prof in professionals:
-        # Build base query - FIXED: use func.coalesce to handle None values
-        query = db.query(
-            func.coalesce(func.sum(Booking.price), 0.0).label('revenue'),
-            func.count(Booking.id).label('bookings')
-        ).filter(
-            Booking.professional_id == prof.id,
-            Booking.status == 'completed'
-        )
-        
-        # Add date filters if provided
-        if start_date:
-            query = query.filter(Booking.booking_date >= start_date)
-        if end_date:
-            query = query.filter(Booking.booking_date <= end_date)
-        
-        result = query.first()
+        result = totals.get(prof.id)
         
         professional_revenue.append({
             "professional_id": prof.id,
             "professional_name": prof.display_name,
             "is_owner": prof.is_owner,
-            "revenue": round(float(result.revenue), 2),
-            "bookings": int(result.bookings),
+            "revenue": round(float(result.revenue), 2) if result else 0.0,
+            "bookings": int(result.bookings) if result else 0,
             "avatar_url": prof.avatar_url
         })
     
@@ -355,40 +304,33 @@ def get_revenue_by_service(
     if current_user.user_type != 'vendor':
         raise HTTPException(status_code=403, detail="Only vendors can access analytics")
     
-    from lib.models.service import Service
-    
     # Get vendor from user
     vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor profile not found")
     
-    # Get all professional IDs for this vendor
-    professional_ids = db.query(Professional.id).filter(
-        Professional.vendor_id == vendor.id
-    ).all()
-    professional_ids = [p[0] for p in professional_ids]
-    
-    # Build query - FIXED: use proper aggregation
+    # Build query from the rollup
     query = db.query(
         Service.id,
         Service.name,
-        func.sum(Booking.price).label('revenue'),
-        func.count(Booking.id).label('bookings')
+        func.sum(DailyRevenueRollup.revenue).label('revenue'),
+        func.sum(DailyRevenueRollup.booking_count).label('bookings')
     ).join(
-        Booking, Booking.service_id == Service.id
+        DailyRevenueRollup, DailyRevenueRollup.service_id == Service.id
     ).filter(
-        Booking.professional_id.in_(professional_ids),
-        Booking.status == 'completed'
+        DailyRevenueRollup.vendor_id == vendor.id
     )
     
     # Add date filters if provided
     if start_date:
-        query = query.filter(Booking.booking_date >= start_date)
+        query = query.filter(DailyRevenueRollup.date >= start_date)
     if end_date:
-        query = query.filter(Booking.booking_date <= end_date)
+        query = query.filter(DailyRevenueRollup.date <= end_date)
     
     # Group by service
-    service_data = query.group_by(Service.id, Service.name).all()
+    service_data = query.group_by(Service.id, Service.name).having(
+        func.sum(DailyRevenueRollup.booking_count) > 0
+    ).all()
     
     service_breakdown = [
         {
@@ -410,3 +352,66 @@ def get_revenue_by_service(
         "total_revenue": round(sum(s["revenue"] for s in service_breakdown), 2),
         "total_bookings": sum(s["bookings"] for s in service_breakdown)
     }
+
+
+@router.post("/revenue/rebuild")
+def rebuild_revenue(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Recompute the vendor's revenue rollup from raw bookings (backfill/repair)"""
+    if current_user.user_type != 'vendor':
+        raise HTTPException(status_code=403, detail="Only vendors can access analytics")
+    
+    vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
+    if not vendor:
+        raise HTTPException(status_code=404, detail="Vendor profile not found")
+    
+    rows = rebuild_revenue_rollup(vendor.id, db)
+    
+    return {"rollup_rows": rows}
+
+
+@router.get("/export/bookings")
+def export_booking_facts(
+    format: str = Query("csv", regex="^(csv|columns|parquet)$"),
+    start_date: Optional[date] = Query(None, description="Start date for export"),
+    end_date: Optional[date] = Query(None, description="End date for export"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export the vendor's booking facts for offline BI
+    
+    - csv: streamed row by row
+    - columns: JSON with one array per column
+    - parquet: Apache Parquet file
+    """
+    if current_user.user_type != 'vendor':
+        raise HTTPException(status_code=403, detail="Only vendors can access analytics")
+    
+    vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
+    if not vendor:
+        raise HTTPException(status_code=404, detail="Vendor profile not found")
+    
+    query = booking_facts_query(vendor.id, start_date, end_date)
+    filename = f"bookings_vendor_{vendor.id}"
+    
+    if format == "csv":
+        return StreamingResponse(
+            stream_booking_facts_csv(query, db),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'}
+        )
+    
+    if format == "parquet":
+        return Response(
+            content=booking_facts_to_parquet(query, db),
+            media_type="application/vnd.apache.parquet",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.parquet"'}
+        )
+    
+    return {
+        "columns": BOOKING_FACT_COLUMNS,
+        "data": booking_facts_to_columns(query, db)
+    }
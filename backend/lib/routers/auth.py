@@ -5,7 +5,7 @@ from lib.models.user import User, UserType
 from lib.models.vendor import Vendor
 from lib.models.professional import Professional
 from lib.schemas.user import UserRegister, UserLogin, TokenResponse, UserResponse
-from lib.auth import get_password_hash, verify_password, create_access_token, get_current_user
+from lib.auth import get_password_hash, verify_password, create_user_token, revoke_user_tokens, get_current_user
 
 router = APIRouter()
 
@@ -57,7 +57,7 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
         db.commit()
     
     # Create access token
-    access_token = create_access_token(data={"user_id": new_user.id})
+    access_token = create_user_token(new_user, db)
     
     return {
         "access_token": access_token,
@@ -75,7 +75,7 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
             detail="Incorrect email or password"
         )
     
-    access_token = create_access_token(data={"user_id": user.id})
+    access_token = create_user_token(user, db)
     
     return {
         "access_token": access_token,
@@ -86,3 +86,11 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
 @router.get("/me", response_model=UserResponse)
 def get_me(current_user: User = Depends(get_current_user)):
     return current_user
+
+# Sign out of every session (revokes all tokens issued so far)
+@router.post("/logout-all")
+def logout_all(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    revoke_user_tokens(current_user)
+    db.commit()
+    
+    return {"message": "Signed out of all sessions"}
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import date
-from lib.database import get_db
-from lib.models.user import User, UserType
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+from lib.database import get_db, get_async_db, run_in_session
 from lib.models.vendor import Vendor
 from lib.models.professional import Professional
 from lib.models.availability import WeeklySchedule, TimeBlocker
@@ -12,34 +12,44 @@ from lib.schemas.availability import (
     WeeklyScheduleUpdate,
     TimeBlockerCreate,
     TimeBlockerResponse,
-    AvailabilityResponse
+    AvailabilityResponse,
+    AvailabilityRangeResponse,
+    NextAvailableResponse
+)
+from lib.auth import get_current_claims
+from lib.permissions import Claims, require_professional, authorize_manage
+from lib.availability_cache import get_availability_cache
+from lib.availability_utils import (
+    calculate_available_slots,
+    calculate_available_slots_range,
+    find_next_available_openings,
+    initialize_weekly_schedule
 )
-from lib.auth import get_current_user
-from lib.availability_utils import calculate_available_slots, initialize_weekly_schedule
 
 router = APIRouter()
 
+# Longest window the range endpoint will compute in one request
+MAX_SLOT_RANGE_DAYS = 62
+
 # ========== WEEKLY SCHEDULE ==========
 
 # Get current user's weekly schedule (vendor/professional)
 @router.get("/schedule/me", response_model=List[WeeklyScheduleResponse])
 def get_my_schedule(
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-    if not professional:
-        raise HTTPException(status_code=404, detail="Professional profile not found")
+    professional_id = require_professional(claims)
     
     schedules = db.query(WeeklySchedule).filter(
-        WeeklySchedule.professional_id == professional.id
+        WeeklySchedule.professional_id == professional_id
     ).all()
     
     # If no schedule exists, initialize default
     if not schedules:
-        initialize_weekly_schedule(professional.id, db)
+        initialize_weekly_schedule(professional_id, db)
         schedules = db.query(WeeklySchedule).filter(
-            WeeklySchedule.professional_id == professional.id
+            WeeklySchedule.professional_id == professional_id
         ).all()
     
     return schedules
@@ -68,32 +78,17 @@ def get_professional_schedule(professional_id: int, db: Session = Depends(get_db
 def update_schedule_day(
     schedule_id: int,
     schedule_data: WeeklyScheduleUpdate,
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-    if not professional:
-        raise HTTPException(status_code=404, detail="Professional profile not found")
+    require_professional(claims)
     
     schedule = db.query(WeeklySchedule).filter(WeeklySchedule.id == schedule_id).first()
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
     
-    # Check authorization
-    if schedule.professional_id != professional.id:
-        # Vendor can edit any professional's schedule in their business
-        if not professional.is_owner:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized"
-            )
-        vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
-        schedule_professional = db.query(Professional).filter(Professional.id == schedule.professional_id).first()
-        if not schedule_professional or schedule_professional.vendor_id != vendor.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized"
-            )
+    # Own schedule, or (for the vendor) any professional's schedule in their business
+    authorize_manage(claims, schedule)
     
     # Update fields
     update_data = schedule_data.model_dump(exclude_unset=True)
@@ -102,6 +97,9 @@ def update_schedule_day(
     
     db.commit()
     db.refresh(schedule)
+    
+    # Every date falling on this weekday may have changed
+    get_availability_cache().invalidate_professional(schedule.professional_id)
     return schedule
 
 # ========== TIME BLOCKERS ==========
@@ -109,15 +107,14 @@ def update_schedule_day(
 # Get current user's time blockers
 @router.get("/blockers/me", response_model=List[TimeBlockerResponse])
 def get_my_blockers(
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-    if not professional:
-        raise HTTPException(status_code=404, detail="Professional profile not found")
+    professional_id = require_professional(claims)
     
     blockers = db.query(TimeBlocker).filter(
-        TimeBlocker.professional_id == professional.id
+        TimeBlocker.professional_id == professional_id,
+        TimeBlocker.deleted_at.is_(None)
     ).order_by(TimeBlocker.date).all()
     
     return blockers
@@ -130,7 +127,8 @@ def get_professional_blockers(professional_id: int, db: Session = Depends(get_db
         raise HTTPException(status_code=404, detail="Professional not found")
     
     blockers = db.query(TimeBlocker).filter(
-        TimeBlocker.professional_id == professional_id
+        TimeBlocker.professional_id == professional_id,
+        TimeBlocker.deleted_at.is_(None)
     ).order_by(TimeBlocker.date).all()
     
     return blockers
@@ -139,12 +137,10 @@ def get_professional_blockers(professional_id: int, db: Session = Depends(get_db
 @router.post("/blockers", response_model=List[TimeBlockerResponse], status_code=status.HTTP_201_CREATED)
 def create_time_blocker(
     blocker_data: TimeBlockerCreate,
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-    if not professional:
-        raise HTTPException(status_code=404, detail="Professional profile not found")
+    professional_id = require_professional(claims)
     
     # Handle date range
     start_date = blocker_data.start_date
@@ -155,7 +151,7 @@ def create_time_blocker(
     
     while current_date <= end_date:
         blocker = TimeBlocker(
-            professional_id=professional.id,
+            professional_id=professional_id,
             date=current_date,
             start_time=blocker_data.start_time,
             end_time=blocker_data.end_time,
@@ -172,6 +168,7 @@ def create_time_blocker(
     
     for blocker in created_blockers:
         db.refresh(blocker)
+        get_availability_cache().invalidate_day(professional_id, blocker.date)
     
     return created_blockers
 
@@ -179,61 +176,179 @@ def create_time_blocker(
 @router.delete("/blockers/{blocker_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_time_blocker(
     blocker_id: int,
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-    if not professional:
-        raise HTTPException(status_code=404, detail="Professional profile not found")
+    require_professional(claims)
     
-    blocker = db.query(TimeBlocker).filter(TimeBlocker.id == blocker_id).first()
+    blocker = db.query(TimeBlocker).filter(
+        TimeBlocker.id == blocker_id,
+        TimeBlocker.deleted_at.is_(None)
+    ).first()
     if not blocker:
         raise HTTPException(status_code=404, detail="Time blocker not found")
     
     # Check authorization
-    if blocker.professional_id != professional.id:
-        if not professional.is_owner:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized"
-            )
-        vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
-        blocker_professional = db.query(Professional).filter(Professional.id == blocker.professional_id).first()
-        if not blocker_professional or blocker_professional.vendor_id != vendor.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized"
-            )
-    
-    db.delete(blocker)
+    authorize_manage(claims, blocker)
+    
+    # Soft delete so calendar sync clients learn about the removal
+    blocker.deleted_at = datetime.utcnow()
     db.commit()
+    
+    get_availability_cache().invalidate_day(blocker.professional_id, blocker.date)
     return None
 
 # ========== AVAILABILITY SLOTS ==========
+# Slot routes are async def: their queries run on the async engine, so a burst
+# of slot lookups doesn't queue behind the threadpool. They stay on the primary
+# (not the read replica) because their results fill the slot cache, which is
+# only invalidated by writes; a lagging replica would cache pre-write slots.
+
+def build_available_slots(professional_id: int, service_id: int, target_date: date, db: Session) -> dict:
+    """AvailabilityResponse payload for one date"""
+    professional = db.query(Professional).filter(Professional.id == professional_id).first()
+    if not professional:
+        raise HTTPException(status_code=404, detail="Professional not found")
+    
+    slots = calculate_available_slots(
+        professional_id=professional_id,
+        service_id=service_id,
+        target_date=target_date,
+        db=db
+    )
+    
+    return {
+        "date": target_date,
+        "professional_id": professional_id,
+        "service_id": service_id,
+        "slots": [{"start_time": slot['start_time'].time(), "end_time": slot['end_time'].time()} for slot in slots]
+    }
 
 # Get available slots for booking (public)
 @router.get("/slots", response_model=AvailabilityResponse)
-def get_available_slots(
+async def get_available_slots(
     professional_id: int = Query(...),
     service_id: int = Query(...),
     date: date = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get available time slots for a professional/service on a specific date"""
+    return await run_in_session(db, build_available_slots, professional_id, service_id, date)
+
+def build_available_slots_range(professional_id: int, service_id: int, start_date: date, end_date: date, db: Session) -> dict:
+    """AvailabilityRangeResponse payload (range already validated)"""
     professional = db.query(Professional).filter(Professional.id == professional_id).first()
     if not professional:
         raise HTTPException(status_code=404, detail="Professional not found")
     
-    slots = calculate_available_slots(
+    slots_by_date = calculate_available_slots_range(
         professional_id=professional_id,
         service_id=service_id,
-        target_date=date,
+        start_date=start_date,
+        end_date=end_date,
         db=db
     )
     
+    days = []
+    current_date = start_date
+    while current_date <= end_date:
+        days.append({
+            "date": current_date,
+            "slots": [
+                {"start_time": slot['start_time'].time(), "end_time": slot['end_time'].time()}
+                for slot in slots_by_date.get(current_date, [])
+            ]
+        })
+        current_date += timedelta(days=1)
+    
     return {
-        "date": date,
+        "start_date": start_date,
+        "end_date": end_date,
         "professional_id": professional_id,
         "service_id": service_id,
-        "slots": [{"start_time": slot['start_time'].time(), "end_time": slot['end_time'].time()} for slot in slots]
+        "days": days
     }
+
+# Get available slots for every date in a range (public)
+@router.get("/slots/range", response_model=AvailabilityRangeResponse)
+async def get_available_slots_range(
+    professional_id: int = Query(...),
+    service_id: int = Query(...),
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get available time slots for a professional/service across a date range"""
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must be on or after start_date"
+        )
+    if (end_date - start_date).days + 1 > MAX_SLOT_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range cannot exceed {MAX_SLOT_RANGE_DAYS} days"
+        )
+    
+    return await run_in_session(db, build_available_slots_range, professional_id, service_id, start_date, end_date)
+
+# Slot cache counters (monitoring)
+@router.get("/cache/stats")
+def get_availability_cache_stats():
+    """Hit/miss/eviction counters for the availability slot cache"""
+    return get_availability_cache().stats()
+
+def build_next_available(
+    vendor_id: int,
+    category_slug: str,
+    start_date: Optional[date],
+    days: int,
+    limit: int,
+    db: Session
+) -> dict:
+    """NextAvailableResponse payload"""
+    vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
+    if not vendor:
+        raise HTTPException(status_code=404, detail="Vendor not found")
+    
+    now = datetime.now()
+    search_start = start_date or now.date()
+    search_end = search_start + timedelta(days=days - 1)
+    
+    openings = find_next_available_openings(
+        vendor_id=vendor_id,
+        category_slug=category_slug,
+        start_date=search_start,
+        end_date=search_end,
+        limit=limit,
+        db=db,
+        not_before=now
+    )
+    
+    return {
+        "vendor_id": vendor_id,
+        "category_slug": category_slug,
+        "start_date": search_start,
+        "end_date": search_end,
+        "openings": [
+            {
+                **opening,
+                "start_time": opening['start_time'].time(),
+                "end_time": opening['end_time'].time()
+            }
+            for opening in openings
+        ]
+    }
+
+# Get earliest openings across a vendor's team for a category (public)
+@router.get("/next-available", response_model=NextAvailableResponse)
+async def get_next_available(
+    vendor_id: int = Query(...),
+    category_slug: str = Query(...),
+    start_date: Optional[date] = Query(None),
+    days: int = Query(14, ge=1, le=MAX_SLOT_RANGE_DAYS),
+    limit: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the N earliest openings at a vendor for any professional offering the category"""
+    return await run_in_session(db, build_next_available, vendor_id, category_slug, start_date, days, limit)
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy import or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List,Optional
-from datetime import datetime, timedelta,date
-from lib.database import get_db
+from datetime import datetime, timedelta, timezone, date, time
+from lib.database import get_db, get_async_db, run_in_session
 from lib.models.user import User, UserType
-from lib.models.vendor import Vendor
 from lib.models.professional import Professional
 from lib.models.service import Service
 from lib.models.booking import Booking, BookingStatus
@@ -12,6 +14,7 @@ from lib.models.availability import WeeklySchedule, TimeBlocker, DayOfWeek
 from lib.schemas.booking import (
     BookingCreate,
     BookingResponse,
+    BookingPage,
     BookingUpdate,
     BookingCancelRequest,
     BookingCustomerInfo,
@@ -22,22 +25,50 @@ from lib.schemas.booking import (
     CalendarWeeklySchedule,
     CalendarDaySchedule,
     CalendarTimeBlocker,
-    CalendarBooking
+    CalendarBooking,
+    CalendarBookingChange,
+    CalendarTimeBlockerChange,
+    CalendarChangesResponse
 )
-from lib.auth import get_current_user
-from lib.availability_utils import calculate_available_slots
-from lib.booking_utils import update_professional_booking_count
+from lib.auth import get_current_claims, current_professional
+from lib.permissions import Claims, require_staff, require_customer, require_vendor, require_professional, can_manage, can_access_booking
+from lib.availability_cache import get_availability_cache
+from lib.pagination import encode_cursor, decode_cursor
+from lib.http_cache import etag_response
+from lib.availability_utils import is_slot_available
+from lib.booking_utils import update_professional_booking_count, lock_professional_day
+from lib.analytics_utils import apply_revenue_rollup
 
 router = APIRouter()
 
+# updated_at/created_at are stamped at flush, not commit, so a row can become
+# visible with a timestamp older than a poll that ran before it committed. The
+# sync watermark trails the clock by more than any write transaction lasts.
+CALENDAR_SYNC_LAG = timedelta(seconds=60)
+
+def booking_response_options():
+    """
+    Loader options for booking queries that feed populate_booking_response
+    
+    Customers, services, professionals (with their vendor) and reviews are
+    loaded with one extra SELECT each for the whole result set, so serializing
+    N bookings costs a constant number of queries instead of ~5 per booking.
+    """
+    return (
+        selectinload(Booking.customer),
+        selectinload(Booking.service),
+        selectinload(Booking.professional).joinedload(Professional.vendor),
+        selectinload(Booking.review)
+    )
+
 def populate_booking_response(booking: Booking, db: Session) -> BookingResponse:
-    """Helper to populate booking with related data"""
-    customer = db.query(User).filter(User.id == booking.customer_id).first()
-    professional = db.query(Professional).filter(Professional.id == booking.professional_id).first()
-    service = db.query(Service).filter(Service.id == booking.service_id).first()
+    """Helper to populate booking with related data (eager-load with booking_response_options)"""
+    customer = booking.customer
+    professional = booking.professional
+    service = booking.service
     
     # Get vendor business name
-    vendor = db.query(Vendor).filter(Vendor.id == professional.vendor_id).first() if professional else None
+    vendor = professional.vendor if professional else None
     
     # Check if booking has review
     has_review = booking.review is not None
@@ -78,20 +109,8 @@ def populate_booking_response(booking: Booking, db: Session) -> BookingResponse:
         has_review=has_review
     )
 
-# Create booking
-@router.post("/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
-def create_booking(
-    booking_data: BookingCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    # Only customers can create bookings
-    if current_user.user_type != UserType.CUSTOMER:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only customers can create bookings"
-        )
-    
+def place_booking(booking_data: BookingCreate, customer_id: int, db: Session) -> BookingResponse:
+    """Validate the slot and create a pending booking. Commits."""
     # Get service to calculate end time and price
     service = db.query(Service).filter(Service.id == booking_data.service_id).first()
     if not service:
@@ -109,22 +128,17 @@ def create_booking(
     end_datetime = start_datetime + timedelta(minutes=service.duration_minutes)
     end_time = end_datetime.time()
     
+    # Lock the professional's day so concurrent requests can't both pass the check
+    lock_professional_day(booking_data.professional_id, booking_data.booking_date, db)
+    
     # Check if slot is still available
-    available_slots = calculate_available_slots(
+    if not is_slot_available(
         professional_id=booking_data.professional_id,
-        service_id=booking_data.service_id,
         target_date=booking_data.booking_date,
+        start_time=booking_data.start_time,
+        service_duration=service.duration_minutes,
         db=db
-    )
-    
-    # Check if requested time is in available slots
-    is_available = False
-    for slot in available_slots:
-        if slot['start_time'].time() == booking_data.start_time:
-            is_available = True
-            break
-    
-    if not is_available:
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This time slot is no longer available"
@@ -132,7 +146,7 @@ def create_booking(
     
     # Create booking with PENDING status
     booking = Booking(
-        customer_id=current_user.id,
+        customer_id=customer_id,
         professional_id=booking_data.professional_id,
         service_id=booking_data.service_id,
         booking_date=booking_data.booking_date,
@@ -147,8 +161,22 @@ def create_booking(
     db.commit()
     db.refresh(booking)
     
+    get_availability_cache().invalidate_day(booking.professional_id, booking.booking_date)
+    
     return populate_booking_response(booking, db)
 
+# Create booking (async: runs on the async engine instead of a threadpool worker)
+@router.post("/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
+async def create_booking(
+    booking_data: BookingCreate,
+    claims: Claims = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Only customers can create bookings
+    require_customer(claims, "Only customers can create bookings")
+    
+    return await run_in_session(db, place_booking, booking_data, claims.user_id)
+
 # ========== CALENDAR VIEWS ==========
 
 def get_week_range(date_obj: date) -> tuple:
@@ -169,93 +197,85 @@ def get_month_range(date_obj: date) -> tuple:
         end = start.replace(month=start.month + 1, day=1) - timedelta(days=1)
     return start, end
 
-def format_professional_calendar(
-    professional: Professional,
+def build_weekly_schedule(schedules: List[WeeklySchedule]) -> CalendarWeeklySchedule:
+    """Build the Monday-Sunday calendar schedule from a professional's schedule rows"""
+    schedule_by_day = {s.day_of_week: s for s in schedules}
+    
+    days = {}
+    for day in DayOfWeek:
+        schedule = schedule_by_day.get(day)
+        if schedule:
+            days[day.value] = CalendarDaySchedule(
+                is_available=bool(schedule.is_available),
+                start_time=schedule.start_time,
+                end_time=schedule.end_time
+            )
+        else:
+            days[day.value] = CalendarDaySchedule(is_available=False)
+    
+    return CalendarWeeklySchedule(**days)
+
+def build_calendar_professionals(
+    professionals: List[Professional],
     start_date: date,
     end_date: date,
     db: Session
-) -> CalendarProfessional:
-    """Format professional data for calendar view"""
+) -> List[CalendarProfessional]:
+    """
+    Format calendar data for several professionals
+    
+    Schedules, blockers and bookings (with customer and service names) are each
+    loaded with a single query for all professionals and grouped in memory.
+    """
+    if not professionals:
+        return []
+    
+    professional_ids = [p.id for p in professionals]
     
-    # Get weekly schedule
+    # Get weekly schedules
     schedules = db.query(WeeklySchedule).filter(
-        WeeklySchedule.professional_id == professional.id
+        WeeklySchedule.professional_id.in_(professional_ids)
     ).all()
     
-    # Create schedule dict
-    schedule_dict = {s.day_of_week.value: s for s in schedules}
-    
-    weekly_schedule = CalendarWeeklySchedule(
-        monday=CalendarDaySchedule(
-            is_available=schedule_dict.get('monday', None) and schedule_dict['monday'].is_available,
-            start_time=schedule_dict.get('monday', None) and schedule_dict['monday'].start_time,
-            end_time=schedule_dict.get('monday', None) and schedule_dict['monday'].end_time
-        ) if 'monday' in schedule_dict else CalendarDaySchedule(is_available=False),
-        tuesday=CalendarDaySchedule(
-            is_available=schedule_dict.get('tuesday', None) and schedule_dict['tuesday'].is_available,
-            start_time=schedule_dict.get('tuesday', None) and schedule_dict['tuesday'].start_time,
-            end_time=schedule_dict.get('tuesday', None) and schedule_dict['tuesday'].end_time
-        ) if 'tuesday' in schedule_dict else CalendarDaySchedule(is_available=False),
-        wednesday=CalendarDaySchedule(
-            is_available=schedule_dict.get('wednesday', None) and schedule_dict['wednesday'].is_available,
-            start_time=schedule_dict.get('wednesday', None) and schedule_dict['wednesday'].start_time,
-            end_time=schedule_dict.get('wednesday', None) and schedule_dict['wednesday'].end_time
-        ) if 'wednesday' in schedule_dict else CalendarDaySchedule(is_available=False),
-        thursday=CalendarDaySchedule(
-            is_available=schedule_dict.get('thursday', None) and schedule_dict['thursday'].is_available,
-            start_time=schedule_dict.get('thursday', None) and schedule_dict['thursday'].start_time,
-            end_time=schedule_dict.get('thursday', None) and schedule_dict['thursday'].end_time
-        ) if 'thursday' in schedule_dict else CalendarDaySchedule(is_available=False),
-        friday=CalendarDaySchedule(
-            is_available=schedule_dict.get('friday', None) and schedule_dict['friday'].is_available,
-            start_time=schedule_dict.get('friday', None) and schedule_dict['friday'].start_time,
-            end_time=schedule_dict.get('friday', None) and schedule_dict['friday'].end_time
-        ) if 'friday' in schedule_dict else CalendarDaySchedule(is_available=False),
-        saturday=CalendarDaySchedule(
-            is_available=schedule_dict.get('saturday', None) and schedule_dict['saturday'].is_available,
-            start_time=schedule_dict.get('saturday', None) and schedule_dict['saturday'].start_time,
-            end_time=schedule_dict.get('saturday', None) and schedule_dict['saturday'].end_time
-        ) if 'saturday' in schedule_dict else CalendarDaySchedule(is_available=False),
-        sunday=CalendarDaySchedule(
-            is_available=schedule_dict.get('sunday', None) and schedule_dict['sunday'].is_available,
-            start_time=schedule_dict.get('sunday', None) and schedule_dict['sunday'].start_time,
-            end_time=schedule_dict.get('sunday', None) and schedule_dict['sunday'].end_time
-        ) if 'sunday' in schedule_dict else CalendarDaySchedule(is_available=False)
-    )
-    
     # Get time blockers in date range
     blockers = db.query(TimeBlocker).filter(
-        TimeBlocker.professional_id == professional.id,
+        TimeBlocker.professional_id.in_(professional_ids),
         TimeBlocker.date >= start_date,
-        TimeBlocker.date <= end_date
+        TimeBlocker.date <= end_date,
+        TimeBlocker.deleted_at.is_(None)
     ).all()
     
-    time_blockers = [
-        CalendarTimeBlocker(
-            date=b.date,
-            start_time=b.start_time,
-            end_time=b.end_time,
-            reason=b.reason
-        ) for b in blockers
-    ]
-    
-    # Get bookings in date range
-    bookings = db.query(Booking).filter(
-        Booking.professional_id == professional.id,
+    # Get bookings in date range with customer and service names
+    booking_rows = db.query(Booking, User.full_name, Service.name).outerjoin(
+        User, User.id == Booking.customer_id
+    ).outerjoin(
+        Service, Service.id == Booking.service_id
+    ).filter(
+        Booking.professional_id.in_(professional_ids),
         Booking.booking_date >= start_date,
         Booking.booking_date <= end_date,
         Booking.status.in_(['pending', 'confirmed', 'completed'])
     ).all()
     
-    calendar_bookings = []
-    for booking in bookings:
-        customer = db.query(User).filter(User.id == booking.customer_id).first()
-        service = db.query(Service).filter(Service.id == booking.service_id).first()
-        
-        calendar_bookings.append(CalendarBooking(
+    schedules_by_professional = defaultdict(list)
+    for schedule in schedules:
+        schedules_by_professional[schedule.professional_id].append(schedule)
+    
+    blockers_by_professional = defaultdict(list)
+    for b in blockers:
+        blockers_by_professional[b.professional_id].append(CalendarTimeBlocker(
+            date=b.date,
+            start_time=b.start_time,
+            end_time=b.end_time,
+            reason=b.reason
+        ))
+    
+    bookings_by_professional = defaultdict(list)
+    for booking, customer_name, service_name in booking_rows:
+        bookings_by_professional[booking.professional_id].append(CalendarBooking(
             id=booking.id,
-            customer_name=customer.full_name if customer else "Unknown",
-            service_name=service.name if service else "Unknown",
+            customer_name=customer_name or "Unknown",
+            service_name=service_name or "Unknown",
             booking_date=booking.booking_date,
             start_time=booking.start_time,
             end_time=booking.end_time,
@@ -264,33 +284,30 @@ def format_professional_calendar(
             customer_notes=booking.customer_notes
         ))
     
-    return CalendarProfessional(
-        professional_id=professional.id,
-        professional_name=professional.display_name,
-        calendar_color=professional.calendar_color,
-        weekly_schedule=weekly_schedule,
-        time_blockers=time_blockers,
-        bookings=calendar_bookings
-    )
+    return [
+        CalendarProfessional(
+            professional_id=professional.id,
+            professional_name=professional.display_name,
+            calendar_color=professional.calendar_color,
+            weekly_schedule=build_weekly_schedule(schedules_by_professional[professional.id]),
+            time_blockers=blockers_by_professional[professional.id],
+            bookings=bookings_by_professional[professional.id]
+        )
+        for professional in professionals
+    ]
 
 # Get professional's calendar (own bookings)
 @router.get("/calendar/me", response_model=CalendarResponse)
-def get_my_calendar(
+async def get_my_calendar(
+    request: Request,
     view: str = Query("week", regex="^(week|month)$"),
     date: Optional[date] = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    claims: Claims = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Professional's calendar view (own bookings only)"""
-    if current_user.user_type not in [UserType.VENDOR, UserType.PROFESSIONAL]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only vendors and professionals can access calendar"
-        )
-    
-    professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-    if not professional:
-        raise HTTPException(status_code=404, detail="Professional profile not found")
+    require_staff(claims, "Only vendors and professionals can access calendar")
+    professional = await run_in_session(db, current_professional, claims)
     
     # Use provided date or today
     target_date = date or datetime.now().date()
@@ -301,35 +318,27 @@ def get_my_calendar(
     else:  # month
         start_date, end_date = get_month_range(target_date)
     
-    # Format professional calendar
-    professional_data = format_professional_calendar(professional, start_date, end_date, db)
-    
-    return CalendarResponse(
+    calendar = CalendarResponse(
         start_date=start_date,
         end_date=end_date,
         view_type=view,
-        professionals=[professional_data]
+        professionals=await run_in_session(db, build_calendar_professionals, [professional], start_date, end_date)
     )
+    
+    return etag_response(request, calendar)
 
 # Get vendor's team calendar (all professionals, with filter)
 @router.get("/calendar/vendor", response_model=CalendarResponse)
-def get_vendor_calendar(
+async def get_vendor_calendar(
+    request: Request,
     view: str = Query("week", regex="^(week|month)$"),
     date: Optional[date] = Query(None),
     professional_ids: Optional[str] = Query(None),  # Comma-separated IDs
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    claims: Claims = Depends(get_current_claims),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Vendor's team calendar (all professionals, filterable)"""
-    if current_user.user_type != UserType.VENDOR:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only vendors can access team calendar"
-        )
-    
-    vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
-    if not vendor:
-        raise HTTPException(status_code=404, detail="Vendor profile not found")
+    vendor_id = require_vendor(claims, "Only vendors can access team calendar")
     
     # Use provided date or today
     target_date = date or datetime.now().date()
@@ -340,114 +349,211 @@ def get_vendor_calendar(
     else:  # month
         start_date, end_date = get_month_range(target_date)
     
-    # Get professionals to display
+    professionals = await run_in_session(db, get_vendor_calendar_professionals, vendor_id, professional_ids)
+    
+    calendar = CalendarResponse(
+        start_date=start_date,
+        end_date=end_date,
+        view_type=view,
+        professionals=await run_in_session(db, build_calendar_professionals, professionals, start_date, end_date)
+    )
+    
+    # Unchanged polls get a 304 with no body
+    return etag_response(request, calendar)
+
+# Get vendor's team calendar changes since a watermark (incremental sync)
+@router.get("/calendar/vendor/changes", response_model=CalendarChangesResponse)
+def get_vendor_calendar_changes(
+    since: datetime = Query(..., description="updated_at watermark from the previous sync (UTC)"),
+    professional_ids: Optional[str] = Query(None),  # Comma-separated IDs
+    claims: Claims = Depends(get_current_claims),
+    db: Session = Depends(get_db)
+):
+    """Bookings and time blockers changed since the watermark, for the vendor's team"""
+    vendor_id = require_vendor(claims, "Only vendors can access team calendar")
+    
+    # Watermarks are compared against naive UTC columns
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    # Every write stamped before this has committed by now (see CALENDAR_SYNC_LAG)
+    watermark = max(since, datetime.utcnow() - CALENDAR_SYNC_LAG)
+    
+    professionals = get_vendor_calendar_professionals(vendor_id, professional_ids, db)
+    id_list = [p.id for p in professionals]
+    
+    # Inclusive comparison; rows newer than the watermark are resent on the next poll
+    booking_rows = db.query(Booking, User.full_name, Service.name).outerjoin(
+        User, User.id == Booking.customer_id
+    ).outerjoin(
+        Service, Service.id == Booking.service_id
+    ).filter(
+        Booking.professional_id.in_(id_list),
+        Booking.updated_at >= since
+    ).order_by(Booking.updated_at).all()
+    
+    blockers = db.query(TimeBlocker).filter(
+        TimeBlocker.professional_id.in_(id_list),
+        or_(TimeBlocker.created_at >= since, TimeBlocker.deleted_at >= since)
+    ).all()
+    
+    bookings = []
+    for booking, customer_name, service_name in booking_rows:
+        bookings.append(CalendarBookingChange(
+            id=booking.id,
+            professional_id=booking.professional_id,
+            customer_name=customer_name or "Unknown",
+            service_name=service_name or "Unknown",
+            booking_date=booking.booking_date,
+            start_time=booking.start_time,
+            end_time=booking.end_time,
+            status=booking.status,
+            price=booking.price,
+            updated_at=booking.updated_at
+        ))
+    
+    time_blockers = []
+    for b in blockers:
+        time_blockers.append(CalendarTimeBlockerChange(
+            id=b.id,
+            professional_id=b.professional_id,
+            date=b.date,
+            start_time=b.start_time,
+            end_time=b.end_time,
+            reason=b.reason,
+            deleted=b.deleted_at is not None
+        ))
+    
+    return CalendarChangesResponse(
+        since=since,
+        watermark=watermark,
+        bookings=bookings,
+        time_blockers=time_blockers
+    )
+
+def get_vendor_calendar_professionals(
+    vendor_id: int,
+    professional_ids: Optional[str],
+    db: Session
+) -> List[Professional]:
+    """Active professionals to show on the vendor calendar, optionally filtered by comma-separated IDs"""
     if professional_ids:
         # Filter by specific professionals
         id_list = [int(id.strip()) for id in professional_ids.split(',') if id.strip()]
-        professionals = db.query(Professional).filter(
-            Professional.vendor_id == vendor.id,
+        return db.query(Professional).filter(
+            Professional.vendor_id == vendor_id,
             Professional.id.in_(id_list),
             Professional.is_active == True
         ).all()
-    else:
-        # Show all professionals (default)
-        professionals = db.query(Professional).filter(
-            Professional.vendor_id == vendor.id,
-            Professional.is_active == True
-        ).all()
     
-    # Format calendar data for each professional
-    professionals_data = [
-        format_professional_calendar(prof, start_date, end_date, db)
-        for prof in professionals
-    ]
+    # Show all professionals (default)
+    return db.query(Professional).filter(
+        Professional.vendor_id == vendor_id,
+        Professional.is_active == True
+    ).all()
+
+def paginate_booking_history(
+    query,
+    cursor: Optional[str],
+    limit: int,
+    status_filter: Optional[BookingStatus],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    db: Session
+) -> BookingPage:
+    """Apply filters and keyset pagination on (booking_date, start_time, id), newest first"""
+    if status_filter:
+        query = query.filter(Booking.status == status_filter)
+    if start_date:
+        query = query.filter(Booking.booking_date >= start_date)
+    if end_date:
+        query = query.filter(Booking.booking_date <= end_date)
+    
+    if cursor:
+        cursor_date, cursor_time, cursor_id = decode_cursor(cursor, date, time, int)
+        query = query.filter(
+            tuple_(Booking.booking_date, Booking.start_time, Booking.id) <
+            tuple_(cursor_date, cursor_time, cursor_id)
+        )
     
-    return CalendarResponse(
-        start_date=start_date,
-        end_date=end_date,
-        view_type=view,
-        professionals=professionals_data
+    # Fetch one extra row to know whether another page exists
+    bookings = query.options(*booking_response_options()).order_by(
+        Booking.booking_date.desc(), Booking.start_time.desc(), Booking.id.desc()
+    ).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(bookings) > limit:
+        bookings = bookings[:limit]
+        last = bookings[-1]
+        next_cursor = encode_cursor(last.booking_date, last.start_time, last.id)
+    
+    return BookingPage(
+        items=[populate_booking_response(b, db) for b in bookings],
+        next_cursor=next_cursor
     )
 
 # Get customer's bookings
-@router.get("/me/customer", response_model=List[BookingResponse])
+@router.get("/me/customer", response_model=BookingPage)
 def get_customer_bookings(
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    status_filter: Optional[BookingStatus] = Query(None, alias="status"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    if current_user.user_type != UserType.CUSTOMER:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only customers can access this endpoint"
-        )
+    require_customer(claims)
     
-    bookings = db.query(Booking).filter(
-        Booking.customer_id == current_user.id
-    ).order_by(Booking.booking_date.desc(), Booking.start_time.desc()).all()
+    query = db.query(Booking).filter(Booking.customer_id == claims.user_id)
     
-    return [populate_booking_response(b, db) for b in bookings]
+    return paginate_booking_history(query, cursor, limit, status_filter, start_date, end_date, db)
 
 # Get professional's bookings (vendor or professional can access)
-@router.get("/me/professional", response_model=List[BookingResponse])
+@router.get("/me/professional", response_model=BookingPage)
 def get_professional_bookings(
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    status_filter: Optional[BookingStatus] = Query(None, alias="status"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    if current_user.user_type == UserType.VENDOR:
+    if claims.user_type == UserType.VENDOR:
         # Vendor sees all bookings for all their professionals
-        vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
-        if not vendor:
-            raise HTTPException(status_code=404, detail="Vendor profile not found")
+        vendor_id = require_vendor(claims)
         
-        bookings = db.query(Booking).join(Professional).filter(
-            Professional.vendor_id == vendor.id
-        ).order_by(Booking.booking_date.desc(), Booking.start_time.desc()).all()
+        professional_ids = db.query(Professional.id).filter(Professional.vendor_id == vendor_id)
+        query = db.query(Booking).filter(Booking.professional_id.in_(professional_ids))
         
-    elif current_user.user_type == UserType.PROFESSIONAL:
+    elif claims.user_type == UserType.PROFESSIONAL:
         # Professional sees only their own bookings
-        professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-        if not professional:
-            raise HTTPException(status_code=404, detail="Professional profile not found")
+        professional_id = require_professional(claims)
         
-        bookings = db.query(Booking).filter(
-            Booking.professional_id == professional.id
-        ).order_by(Booking.booking_date.desc(), Booking.start_time.desc()).all()
+        query = db.query(Booking).filter(Booking.professional_id == professional_id)
     else:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only vendors and professionals can access this endpoint"
         )
     
-    return [populate_booking_response(b, db) for b in bookings]
+    return paginate_booking_history(query, cursor, limit, status_filter, start_date, end_date, db)
 
 # Get single booking
 @router.get("/{booking_id}", response_model=BookingResponse)
 def get_booking(
     booking_id: int,
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
     booking = db.query(Booking).filter(Booking.id == booking_id).first()
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    # Check authorization
-    if current_user.user_type == UserType.CUSTOMER:
-        if booking.customer_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized")
-    elif current_user.user_type in [UserType.VENDOR, UserType.PROFESSIONAL]:
-        professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-        if not professional:
-            raise HTTPException(status_code=403, detail="Not authorized")
-        
-        # Check if booking belongs to this professional or their vendor
-        if booking.professional_id != professional.id:
-            if not professional.is_owner:
-                raise HTTPException(status_code=403, detail="Not authorized")
-            # Vendor can see all bookings in their business
-            booking_professional = db.query(Professional).filter(Professional.id == booking.professional_id).first()
-            if not booking_professional or booking_professional.vendor_id != professional.vendor_id:
-                raise HTTPException(status_code=403, detail="Not authorized")
+    # Customer who booked, the booking's professional, or their vendor
+    if not can_access_booking(claims, booking):
+        raise HTTPException(status_code=403, detail="Not authorized")
     
     return populate_booking_response(booking, db)
 
@@ -456,10 +562,12 @@ def get_booking(
 def update_booking(
     booking_id: int,
     booking_update: BookingUpdate,
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    # Row lock: concurrent status changes (e.g. a double-clicked "complete") must
+    # see each other's result, or the revenue rollup counts the booking twice
+    booking = db.query(Booking).filter(Booking.id == booking_id).with_for_update().first()
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
@@ -467,19 +575,10 @@ def update_booking(
     old_status = booking.status
     
     # Check authorization and what can be updated
-    if current_user.user_type in [UserType.VENDOR, UserType.PROFESSIONAL]:
-        professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-        if not professional:
+    if claims.is_staff:
+        if not can_manage(claims, booking):
             raise HTTPException(status_code=403, detail="Not authorized")
         
-        # Check authorization
-        if booking.professional_id != professional.id:
-            if not professional.is_owner:
-                raise HTTPException(status_code=403, detail="Not authorized")
-            booking_professional = db.query(Professional).filter(Professional.id == booking.professional_id).first()
-            if not booking_professional or booking_professional.vendor_id != professional.vendor_id:
-                raise HTTPException(status_code=403, detail="Not authorized")
-        
         # Professional/Vendor can update status
         if booking_update.status:
             booking.status = booking_update.status
@@ -488,8 +587,8 @@ def update_booking(
             elif booking_update.status == 'completed':
                 booking.completed_at = datetime.utcnow()
     
-    elif current_user.user_type == UserType.CUSTOMER:
-        if booking.customer_id != current_user.id:
+    elif claims.user_type == UserType.CUSTOMER:
+        if booking.customer_id != claims.user_id:
             raise HTTPException(status_code=403, detail="Not authorized")
         
         # Customer can only update notes and only if booking is pending
@@ -502,6 +601,12 @@ def update_booking(
         if booking_update.customer_notes is not None:
             booking.customer_notes = booking_update.customer_notes
     
+    # Keep the revenue rollup in step with completed bookings (same transaction)
+    if old_status != 'completed' and booking.status == 'completed':
+        apply_revenue_rollup(booking, 1, db)
+    elif old_status == 'completed' and booking.status != 'completed':
+        apply_revenue_rollup(booking, -1, db)
+    
     db.commit()
     db.refresh(booking)
     
@@ -509,6 +614,10 @@ def update_booking(
     if old_status != 'completed' and booking.status == 'completed':
         update_professional_booking_count(booking.professional_id, db)
     
+    # A status change (e.g. to cancelled) can free or take the slot
+    if booking.status != old_status:
+        get_availability_cache().invalidate_day(booking.professional_id, booking.booking_date)
+    
     return populate_booking_response(booking, db)
 
 # Cancel booking
@@ -516,28 +625,17 @@ def update_booking(
 def cancel_booking(
     booking_id: int,
     cancel_data: BookingCancelRequest,
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    # Locked like update_booking, so a racing "complete" can't be overwritten
+    booking = db.query(Booking).filter(Booking.id == booking_id).with_for_update().first()
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
     # Check authorization
-    if current_user.user_type == UserType.CUSTOMER:
-        if booking.customer_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized")
-    elif current_user.user_type in [UserType.VENDOR, UserType.PROFESSIONAL]:
-        professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-        if not professional:
-            raise HTTPException(status_code=403, detail="Not authorized")
-        
-        if booking.professional_id != professional.id:
-            if not professional.is_owner:
-                raise HTTPException(status_code=403, detail="Not authorized")
-            booking_professional = db.query(Professional).filter(Professional.id == booking.professional_id).first()
-            if not booking_professional or booking_professional.vendor_id != professional.vendor_id:
-                raise HTTPException(status_code=403, detail="Not authorized")
+    if not can_access_booking(claims, booking):
+        raise HTTPException(status_code=403, detail="Not authorized")
     
     # Check if already cancelled or completed
     if booking.status in ['cancelled', 'completed']:
@@ -553,36 +651,26 @@ def cancel_booking(
     db.commit()
     db.refresh(booking)
     
+    get_availability_cache().invalidate_day(booking.professional_id, booking.booking_date)
+    
     return populate_booking_response(booking, db)
 
 # Mark as no-show (vendor/professional only)
 @router.post("/{booking_id}/no-show", response_model=BookingResponse)
 def mark_no_show(
     booking_id: int,
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    if current_user.user_type not in [UserType.VENDOR, UserType.PROFESSIONAL]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only vendors and professionals can mark no-shows"
-        )
-    
-    professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-    if not professional:
-        raise HTTPException(status_code=403, detail="Not authorized")
+    require_staff(claims, "Only vendors and professionals can mark no-shows")
     
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = db.query(Booking).filter(Booking.id == booking_id).with_for_update().first()
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
     # Check authorization
-    if booking.professional_id != professional.id:
-        if not professional.is_owner:
-            raise HTTPException(status_code=403, detail="Not authorized")
-        booking_professional = db.query(Professional).filter(Professional.id == booking.professional_id).first()
-        if not booking_professional or booking_professional.vendor_id != professional.vendor_id:
-            raise HTTPException(status_code=403, detail="Not authorized")
+    if not can_manage(claims, booking):
+        raise HTTPException(status_code=403, detail="Not authorized")
     
     if booking.status != 'confirmed':
         raise HTTPException(
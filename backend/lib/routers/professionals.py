@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime
@@ -16,8 +16,11 @@ from lib.schemas.professional import (
     ProfessionalWithEmail,
     ProfessionalInviteResponse
 )
-from lib.auth import get_password_hash, get_current_user, get_current_vendor_user, create_access_token
+from lib.auth import get_password_hash, get_current_user, get_current_vendor_user, create_user_token, revoke_user_tokens
 from lib.schemas.user import TokenResponse
+from lib.search import reindex_vendor
+from lib.vendor_cards import refresh_vendor_card
+from lib.cache import cached_response, invalidate_on_commit, vendor_tag
 
 router = APIRouter()
 
@@ -136,6 +139,9 @@ def vendor_update_professional(
     for field, value in update_dict.items():
         setattr(professional, field, value)
     
+    reindex_vendor(vendor.id, db)
+    refresh_vendor_card(vendor.id, db)
+    invalidate_on_commit(db, vendor_tag(vendor.id))
     db.commit()
     db.refresh(professional)
     
@@ -166,8 +172,14 @@ def delete_professional(
             detail="Cannot delete the owner"
         )
     
+    # Their tokens still claim this professional profile
+    revoke_user_tokens(professional.user)
+    
     # Delete professional (cascades to services, availability, etc.)
     db.delete(professional)
+    reindex_vendor(vendor.id, db)
+    refresh_vendor_card(vendor.id, db)
+    invalidate_on_commit(db, vendor_tag(vendor.id))
     db.commit()
     
     return {"message": "Professional deleted successfully"}
@@ -220,6 +232,9 @@ def update_my_professional_profile(
     for field, value in update_dict.items():
         setattr(professional, field, value)
     
+    reindex_vendor(professional.vendor_id, db)
+    refresh_vendor_card(professional.vendor_id, db)
+    invalidate_on_commit(db, vendor_tag(professional.vendor_id))
     db.commit()
     db.refresh(professional)
     
@@ -227,19 +242,27 @@ def update_my_professional_profile(
 
 # ========== PUBLIC ENDPOINTS ==========
 
-@router.get("/vendor/{vendor_id}", response_model=List[ProfessionalResponse])
-def get_vendor_professionals(vendor_id: int, db: Session = Depends(get_db)):
-    """Public: Get all active professionals at a vendor"""
+def load_vendor_professionals(vendor_id: int, db: Session) -> List[Professional]:
+    """Active professionals at a vendor (404 if the vendor doesn't exist)"""
     vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    professionals = db.query(Professional).filter(
+    return db.query(Professional).filter(
         Professional.vendor_id == vendor_id,
         Professional.is_active == True
     ).all()
-    
-    return professionals
+
+@router.get("/vendor/{vendor_id}", response_model=List[ProfessionalResponse])
+def get_vendor_professionals(vendor_id: int, request: Request, db: Session = Depends(get_db)):
+    """Public: Get all active professionals at a vendor (cached)"""
+    return cached_response(
+        request,
+        key=f"professionals:vendor:{vendor_id}",
+        tags=[vendor_tag(vendor_id)],
+        response_type=List[ProfessionalResponse],
+        build=lambda: load_vendor_professionals(vendor_id, db)
+    )
 
 @router.get("/{professional_id}", response_model=ProfessionalResponse)
 def get_professional(professional_id: int, db: Session = Depends(get_db)):
@@ -306,6 +329,8 @@ def accept_invite(
         is_active=True
     )
     db.add(professional)
+    refresh_vendor_card(invite.vendor_id, db)
+    invalidate_on_commit(db, vendor_tag(invite.vendor_id))
     db.commit()
     
     # Mark invite as accepted
@@ -314,7 +339,7 @@ def accept_invite(
     db.commit()
     
     # Create access token
-    access_token = create_access_token(data={"user_id": new_user.id})
+    access_token = create_user_token(new_user, db)
     
     return {
         "access_token": access_token,
@@ -1,12 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-from lib.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, or_, tuple_
+from typing import Optional
+from datetime import datetime
+from lib.database import get_db, get_read_db
 from lib.models.user import User, UserType
 from lib.models.vendor import Vendor
 from lib.models.professional import Professional
-from lib.models.service import Service
 from lib.models.booking import Booking, BookingStatus
 from lib.models.review import Review
 from lib.schemas.review import (
@@ -14,50 +14,57 @@ from lib.schemas.review import (
     ReviewUpdate,
     ReviewResponse,
     ReviewSummary,
+    ReviewPage,
     ReviewCustomerInfo,
     ReviewProfessionalInfo,
     ReviewServiceInfo
 )
 from lib.auth import get_current_user
+from lib.rating_utils import apply_rating_change, RATING_COUNT_COLUMNS
+from lib.http_cache import etag_response
+from lib.pagination import encode_cursor, decode_cursor
+from lib.vendor_cards import refresh_vendor_card
+from lib.cache import invalidate_on_commit, vendor_tag
 
 router = APIRouter()
 
-def update_professional_rating(professional_id: int, db: Session):
-    """Recalculate and update professional's average rating"""
-    avg_rating = db.query(func.avg(Review.rating)).filter(
-        Review.professional_id == professional_id
-    ).scalar()
-    
-    professional = db.query(Professional).filter(Professional.id == professional_id).first()
-    if professional:
-        professional.rating = round(avg_rating, 1) if avg_rating else 0.0
-        db.commit()
+# Public summaries may be reused briefly by browsers and shared caches, then revalidated
+SUMMARY_CACHE_CONTROL = "public, max-age=60"
 
-def update_vendor_rating(vendor_id: int, db: Session):
-    """Recalculate vendor's rating as average of all professionals"""
-    # Get all professionals for this vendor
-    professionals = db.query(Professional).filter(
-        Professional.vendor_id == vendor_id,
-        Professional.is_active == True
-    ).all()
+def build_review_summary(histogram: dict) -> ReviewSummary:
+    """
+    Build a rating summary from a star histogram
     
-    if not professionals:
-        return
+    Args:
+        histogram: Review count per star rating, e.g. {5: 20, 4: 10, 3: 0, 2: 0, 1: 1}
+    """
+    total_reviews = sum(histogram.values())
+    rating_sum = sum(star * count for star, count in histogram.items())
     
-    # Calculate average of all professional ratings
-    total_rating = sum(p.rating for p in professionals)
-    avg_rating = total_rating / len(professionals)
-    
-    vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
-    if vendor:
-        vendor.rating = round(avg_rating, 1)
-        db.commit()
+    return ReviewSummary(
+        average_rating=round(rating_sum / total_reviews, 1) if total_reviews else 0.0,
+        total_reviews=total_reviews,
+        rating_distribution={star: histogram.get(star, 0) for star in (5, 4, 3, 2, 1)}
+    )
+
+def review_response_options():
+    """
+    Loader options for review queries that feed populate_review_response
+    
+    Customers, professionals and services are loaded with one extra SELECT each
+    for the whole page instead of three lookups per review.
+    """
+    return (
+        selectinload(Review.customer),
+        selectinload(Review.professional),
+        selectinload(Review.service)
+    )
 
 def populate_review_response(review: Review, db: Session) -> ReviewResponse:
-    """Helper to populate review with related data"""
-    customer = db.query(User).filter(User.id == review.customer_id).first()
-    professional = db.query(Professional).filter(Professional.id == review.professional_id).first()
-    service = db.query(Service).filter(Service.id == review.service_id).first()
+    """Helper to populate review with related data (eager-load with review_response_options)"""
+    customer = review.customer
+    professional = review.professional
+    service = review.service
     
     return ReviewResponse(
         id=review.id,
@@ -85,6 +92,44 @@ def populate_review_response(review: Review, db: Session) -> ReviewResponse:
         ) if service else None
     )
 
+def paginate_reviews(
+    query,
+    cursor: Optional[str],
+    limit: int,
+    rating: Optional[int],
+    has_text: Optional[bool],
+    db: Session
+) -> ReviewPage:
+    """Apply filters and keyset pagination on (created_at, id), newest first"""
+    if rating:
+        query = query.filter(Review.rating == rating)
+    if has_text is True:
+        query = query.filter(Review.review_text.isnot(None), func.trim(Review.review_text) != "")
+    elif has_text is False:
+        query = query.filter(or_(Review.review_text.is_(None), func.trim(Review.review_text) == ""))
+    
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor, datetime, int)
+        query = query.filter(
+            tuple_(Review.created_at, Review.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    
+    # Fetch one extra row to know whether another page exists
+    reviews = query.options(*review_response_options()).order_by(
+        Review.created_at.desc(), Review.id.desc()
+    ).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        last = reviews[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    
+    return ReviewPage(
+        items=[populate_review_response(r, db) for r in reviews],
+        next_cursor=next_cursor
+    )
+
 # Create review
 @router.post("/", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
 def create_review(
@@ -137,16 +182,16 @@ def create_review(
     )
     
     db.add(review)
-    db.commit()
-    db.refresh(review)
-    
-    # Update professional's average rating
-    update_professional_rating(booking.professional_id, db)
     
-    # Update vendor's average rating (average of all professionals)
+    # Update professional and vendor rating aggregates in the same transaction
     professional = db.query(Professional).filter(Professional.id == booking.professional_id).first()
     if professional:
-        update_vendor_rating(professional.vendor_id, db)
+        apply_rating_change(professional.id, professional.vendor_id, None, review.rating, db)
+        refresh_vendor_card(professional.vendor_id, db)
+        invalidate_on_commit(db, vendor_tag(professional.vendor_id))
+    
+    db.commit()
+    db.refresh(review)
     
     return populate_review_response(review, db)
 
@@ -175,118 +220,104 @@ def update_review(
             detail="You can only update your own reviews"
         )
     
+    old_rating = review.rating
+    
     # Update fields
     update_data = review_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(review, field, value)
     
+    # Adjust rating aggregates in the same transaction if the rating changed
+    if review.rating != old_rating:
+        professional = db.query(Professional).filter(Professional.id == review.professional_id).first()
+        if professional:
+            apply_rating_change(professional.id, professional.vendor_id, old_rating, review.rating, db)
+            refresh_vendor_card(professional.vendor_id, db)
+            invalidate_on_commit(db, vendor_tag(professional.vendor_id))
+    
     db.commit()
     db.refresh(review)
     
-    # Recalculate ratings
-    update_professional_rating(review.professional_id, db)
-    professional = db.query(Professional).filter(Professional.id == review.professional_id).first()
-    if professional:
-        update_vendor_rating(professional.vendor_id, db)
-    
     return populate_review_response(review, db)
 
 # Get professional's reviews (public)
-@router.get("/professional/{professional_id}", response_model=List[ReviewResponse])
-def get_professional_reviews(professional_id: int, db: Session = Depends(get_db)):
+@router.get("/professional/{professional_id}", response_model=ReviewPage)
+def get_professional_reviews(
+    professional_id: int,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    rating: Optional[int] = Query(None, ge=1, le=5),
+    has_text: Optional[bool] = Query(None),
+    db: Session = Depends(get_read_db)
+):
     professional = db.query(Professional).filter(Professional.id == professional_id).first()
     if not professional:
         raise HTTPException(status_code=404, detail="Professional not found")
     
-    reviews = db.query(Review).filter(
-        Review.professional_id == professional_id
-    ).order_by(Review.created_at.desc()).all()
+    query = db.query(Review).filter(Review.professional_id == professional_id)
     
-    return [populate_review_response(r, db) for r in reviews]
+    return paginate_reviews(query, cursor, limit, rating, has_text, db)
 
 # Get vendor's reviews (public) - all professionals combined
-@router.get("/vendor/{vendor_id}", response_model=List[ReviewResponse])
-def get_vendor_reviews(vendor_id: int, db: Session = Depends(get_db)):
+@router.get("/vendor/{vendor_id}", response_model=ReviewPage)
+def get_vendor_reviews(
+    vendor_id: int,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    rating: Optional[int] = Query(None, ge=1, le=5),
+    has_text: Optional[bool] = Query(None),
+    db: Session = Depends(get_read_db)
+):
     vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    # Get all reviews for all professionals at this vendor
-    reviews = db.query(Review).join(Professional).filter(
-        Professional.vendor_id == vendor_id,
-        Professional.is_active == True
-    ).order_by(Review.created_at.desc()).all()
+    # Every review at this vendor, including deactivated professionals' reviews,
+    # so the feed matches the vendor's rating and summary histogram
+    professional_ids = db.query(Professional.id).filter(Professional.vendor_id == vendor_id)
+    query = db.query(Review).filter(Review.professional_id.in_(professional_ids))
     
-    return [populate_review_response(r, db) for r in reviews]
+    return paginate_reviews(query, cursor, limit, rating, has_text, db)
 
 # Get professional's rating summary (public)
 @router.get("/professional/{professional_id}/summary", response_model=ReviewSummary)
-def get_professional_rating_summary(professional_id: int, db: Session = Depends(get_db)):
+def get_professional_rating_summary(
+    professional_id: int,
+    request: Request,
+    db: Session = Depends(get_read_db)
+):
     professional = db.query(Professional).filter(Professional.id == professional_id).first()
     if not professional:
         raise HTTPException(status_code=404, detail="Professional not found")
     
-    # Get all reviews
-    reviews = db.query(Review).filter(Review.professional_id == professional_id).all()
-    
-    if not reviews:
-        return ReviewSummary(
-            average_rating=0.0,
-            total_reviews=0,
-            rating_distribution={5: 0, 4: 0, 3: 0, 2: 0, 1: 0}
-        )
-    
-    # Calculate distribution
-    distribution = {5: 0, 4: 0, 3: 0, 2: 0, 1: 0}
-    for review in reviews:
-        distribution[review.rating] += 1
-    
-    # Calculate average
-    avg_rating = sum(r.rating for r in reviews) / len(reviews)
+    # Served from the maintained histogram, no review rows are loaded
+    histogram = {star: getattr(professional, column) or 0 for star, column in RATING_COUNT_COLUMNS.items()}
     
-    return ReviewSummary(
-        average_rating=round(avg_rating, 1),
-        total_reviews=len(reviews),
-        rating_distribution=distribution
-    )
+    return etag_response(request, build_review_summary(histogram), cache_control=SUMMARY_CACHE_CONTROL)
 
-# Get vendor's rating summary (public) - combined all professionals
+# Get vendor's rating summary (public) - all reviews at the vendor, same set as the feed
 @router.get("/vendor/{vendor_id}/summary", response_model=ReviewSummary)
-def get_vendor_rating_summary(vendor_id: int, db: Session = Depends(get_db)):
+def get_vendor_rating_summary(
+    vendor_id: int,
+    request: Request,
+    db: Session = Depends(get_read_db)
+):
     vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    # Get all reviews for all professionals at this vendor
-    reviews = db.query(Review).join(Professional).filter(
-        Professional.vendor_id == vendor_id,
-        Professional.is_active == True
-    ).all()
-    
-    if not reviews:
-        return ReviewSummary(
-            average_rating=0.0,
-            total_reviews=0,
-            rating_distribution={5: 0, 4: 0, 3: 0, 2: 0, 1: 0}
-        )
-    
-    # Calculate distribution
-    distribution = {5: 0, 4: 0, 3: 0, 2: 0, 1: 0}
-    for review in reviews:
-        distribution[review.rating] += 1
-    
-    # Calculate average
-    avg_rating = sum(r.rating for r in reviews) / len(reviews)
+    # Served from the vendor's maintained histogram, no review rows are loaded
+    histogram = {star: getattr(vendor, column) or 0 for star, column in RATING_COUNT_COLUMNS.items()}
     
-    return ReviewSummary(
-        average_rating=round(avg_rating, 1),
-        total_reviews=len(reviews),
-        rating_distribution=distribution
-    )
+    return etag_response(request, build_review_summary(histogram), cache_control=SUMMARY_CACHE_CONTROL)
 
 # Get customer's reviews
-@router.get("/my", response_model=List[ReviewResponse])
+@router.get("/my", response_model=ReviewPage)
 def get_my_reviews(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    rating: Optional[int] = Query(None, ge=1, le=5),
+    has_text: Optional[bool] = Query(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -296,11 +327,9 @@ def get_my_reviews(
             detail="Only customers can access this endpoint"
         )
     
-    reviews = db.query(Review).filter(
-        Review.customer_id == current_user.id
-    ).order_by(Review.created_at.desc()).all()
+    query = db.query(Review).filter(Review.customer_id == current_user.id)
     
-    return [populate_review_response(r, db) for r in reviews]
+    return paginate_reviews(query, cursor, limit, rating, has_text, db)
 
 # Check if booking has been reviewed
 @router.get("/booking/{booking_id}", response_model=ReviewResponse)
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request
+from sqlalchemy.orm import Session, selectinload
 from typing import List
-from lib.database import get_db
-from lib.models.user import User, UserType
+from lib.database import get_db, get_read_db
+from lib.models.user import UserType
 from lib.models.vendor import Vendor
 from lib.models.professional import Professional
 from lib.models.service import Service, ServiceImage
@@ -12,31 +12,47 @@ from lib.schemas.service import (
     ServiceResponse,
     ServiceImageResponse
 )
-from lib.auth import get_current_user
+from lib.auth import get_current_claims
+from lib.permissions import Claims, require_professional, require_vendor, authorize_manage
 from lib.cloudinary import upload_image, delete_image
+from lib.search import reindex_vendor
+from lib.vendor_cards import refresh_vendor_card
+from lib.cache import cached_response, invalidate_on_commit, vendor_tag
+from lib.category_registry import get_category_registry
 import re
 
 router = APIRouter()
 
-# Get all services for a specific vendor (public) - includes all professionals
-@router.get("/vendor/{vendor_id}", response_model=List[ServiceResponse])
-def get_vendor_services(vendor_id: int, db: Session = Depends(get_db)):
+def load_vendor_services(vendor_id: int, db: Session) -> List[Service]:
+    """Active services of all active professionals at a vendor (404 if the vendor doesn't exist)"""
     vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    # Get all services from all active professionals at this vendor
-    services = db.query(Service).join(Professional).filter(
+    return db.query(Service).join(Professional).options(
+        selectinload(Service.images),
+        selectinload(Service.category)
+    ).filter(
         Professional.vendor_id == vendor_id,
         Professional.is_active == True,
         Service.is_active == True
     ).all()
-    
-    return services
+
+# Get all services for a specific vendor (public, cached) - includes all professionals
+# Reads the primary, like every cached route, so cache fills never see replica lag
+@router.get("/vendor/{vendor_id}", response_model=List[ServiceResponse])
+def get_vendor_services(vendor_id: int, request: Request, db: Session = Depends(get_db)):
+    return cached_response(
+        request,
+        key=f"services:vendor:{vendor_id}",
+        tags=[vendor_tag(vendor_id)],
+        response_type=List[ServiceResponse],
+        build=lambda: load_vendor_services(vendor_id, db)
+    )
 
 # Get professional's services (public)
 @router.get("/professional/{professional_id}", response_model=List[ServiceResponse])
-def get_professional_services(professional_id: int, db: Session = Depends(get_db)):
+def get_professional_services(professional_id: int, db: Session = Depends(get_read_db)):
     professional = db.query(Professional).filter(Professional.id == professional_id).first()
     if not professional:
         raise HTTPException(status_code=404, detail="Professional not found")
@@ -51,27 +67,23 @@ def get_professional_services(professional_id: int, db: Session = Depends(get_db
 # Get current user's services (vendor or professional)
 @router.get("/me", response_model=List[ServiceResponse])
 def get_my_services(
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    if current_user.user_type == UserType.VENDOR:
+    if claims.user_type == UserType.VENDOR:
         # Vendor sees all services from all their professionals
-        vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
-        if not vendor:
-            raise HTTPException(status_code=404, detail="Vendor profile not found")
+        vendor_id = require_vendor(claims)
         
         services = db.query(Service).join(Professional).filter(
-            Professional.vendor_id == vendor.id
+            Professional.vendor_id == vendor_id
         ).all()
         
-    elif current_user.user_type == UserType.PROFESSIONAL:
+    elif claims.user_type == UserType.PROFESSIONAL:
         # Professional sees only their own services
-        professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-        if not professional:
-            raise HTTPException(status_code=404, detail="Professional profile not found")
+        professional_id = require_professional(claims)
         
         services = db.query(Service).filter(
-            Service.professional_id == professional.id
+            Service.professional_id == professional_id
         ).all()
         
     else:
@@ -84,7 +96,7 @@ def get_my_services(
 
 # Get single service
 @router.get("/{service_id}", response_model=ServiceResponse)
-def get_service(service_id: int, db: Session = Depends(get_db)):
+def get_service(service_id: int, db: Session = Depends(get_read_db)):
     service = db.query(Service).filter(Service.id == service_id).first()
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
@@ -94,21 +106,25 @@ def get_service(service_id: int, db: Session = Depends(get_db)):
 @router.post("/", response_model=ServiceResponse, status_code=status.HTTP_201_CREATED)
 def create_service(
     service_data: ServiceCreate,
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    # Get professional profile
-    professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-    if not professional:
-        raise HTTPException(status_code=404, detail="Professional profile not found")
+    professional_id = require_professional(claims)
+    
+    # Unknown categories are rejected from the registry, without a query
+    if service_data.category_id is not None and not get_category_registry().get(service_data.category_id):
+        raise HTTPException(status_code=400, detail="Invalid category")
     
     # Create service linked to professional
     service = Service(
-        professional_id=professional.id,
+        professional_id=professional_id,
         **service_data.model_dump()
     )
     
     db.add(service)
+    reindex_vendor(claims.vendor_id, db)
+    refresh_vendor_card(claims.vendor_id, db)
+    invalidate_on_commit(db, vendor_tag(claims.vendor_id))
     db.commit()
     db.refresh(service)
     return service
@@ -118,12 +134,10 @@ def create_service(
 def update_service(
     service_id: int,
     service_data: ServiceUpdate,
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-    if not professional:
-        raise HTTPException(status_code=404, detail="Professional profile not found")
+    require_professional(claims)
     
     # Check authorization
     service = db.query(Service).filter(Service.id == service_id).first()
@@ -133,26 +147,19 @@ def update_service(
     # Allow if:
     # 1. Professional owns the service
     # 2. OR user is vendor (owner) of the professional
-    if service.professional_id != professional.id:
-        if not professional.is_owner:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to update this service"
-            )
-        # Vendor can edit any service in their business
-        vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
-        service_professional = db.query(Professional).filter(Professional.id == service.professional_id).first()
-        if not service_professional or service_professional.vendor_id != vendor.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to update this service"
-            )
+    authorize_manage(claims, service, "Not authorized to update this service")
     
     # Update only provided fields
     update_data = service_data.model_dump(exclude_unset=True)
+    if update_data.get("category_id") is not None and not get_category_registry().get(update_data["category_id"]):
+        raise HTTPException(status_code=400, detail="Invalid category")
+    
     for field, value in update_data.items():
         setattr(service, field, value)
     
+    reindex_vendor(service.professional.vendor_id, db)
+    refresh_vendor_card(service.professional.vendor_id, db)
+    invalidate_on_commit(db, vendor_tag(service.professional.vendor_id))
     db.commit()
     db.refresh(service)
     return service
@@ -161,31 +168,17 @@ def update_service(
 @router.delete("/{service_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_service(
     service_id: int,
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-    if not professional:
-        raise HTTPException(status_code=404, detail="Professional profile not found")
+    require_professional(claims)
     
     service = db.query(Service).filter(Service.id == service_id).first()
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
     # Same authorization logic as update
-    if service.professional_id != professional.id:
-        if not professional.is_owner:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to delete this service"
-            )
-        vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
-        service_professional = db.query(Professional).filter(Professional.id == service.professional_id).first()
-        if not service_professional or service_professional.vendor_id != vendor.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to delete this service"
-            )
+    authorize_manage(claims, service, "Not authorized to delete this service")
     
     # Delete service images from Cloudinary
     for image in service.images:
@@ -196,7 +189,11 @@ def delete_service(
         except:
             pass
     
+    vendor_id = service.professional.vendor_id
     db.delete(service)
+    reindex_vendor(vendor_id, db)
+    refresh_vendor_card(vendor_id, db)
+    invalidate_on_commit(db, vendor_tag(vendor_id))
     db.commit()
     return None
 
@@ -205,31 +202,17 @@ def delete_service(
 async def upload_service_image(
     service_id: int,
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-    if not professional:
-        raise HTTPException(status_code=404, detail="Professional profile not found")
+    require_professional(claims)
     
     service = db.query(Service).filter(Service.id == service_id).first()
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
     # Check authorization
-    if service.professional_id != professional.id:
-        if not professional.is_owner:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized"
-            )
-        vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
-        service_professional = db.query(Professional).filter(Professional.id == service.professional_id).first()
-        if not service_professional or service_professional.vendor_id != vendor.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized"
-            )
+    authorize_manage(claims, service)
     
     # Check image limit (3 for free, unlimited for PRO)
     vendor = db.query(Vendor).join(Professional).filter(
@@ -260,6 +243,7 @@ async def upload_service_image(
         )
         
         db.add(service_image)
+        invalidate_on_commit(db, vendor_tag(vendor.id))
         db.commit()
         db.refresh(service_image)
         
@@ -272,12 +256,10 @@ async def upload_service_image(
 @router.delete("/images/{image_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_service_image(
     image_id: int,
-    current_user: User = Depends(get_current_user),
+    claims: Claims = Depends(get_current_claims),
     db: Session = Depends(get_db)
 ):
-    professional = db.query(Professional).filter(Professional.user_id == current_user.id).first()
-    if not professional:
-        raise HTTPException(status_code=404, detail="Professional profile not found")
+    require_professional(claims)
     
     image = db.query(ServiceImage).filter(ServiceImage.id == image_id).first()
     if not image:
@@ -288,19 +270,7 @@ def delete_service_image(
         raise HTTPException(status_code=404, detail="Service not found")
     
     # Check authorization
-    if service.professional_id != professional.id:
-        if not professional.is_owner:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized"
-            )
-        vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
-        service_professional = db.query(Professional).filter(Professional.id == service.professional_id).first()
-        if not service_professional or service_professional.vendor_id != vendor.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized"
-            )
+    authorize_manage(claims, service)
     
     # Delete from Cloudinary
     try:
@@ -311,6 +281,7 @@ def delete_service_image(
         pass
     
     db.delete(image)
+    invalidate_on_commit(db, vendor_tag(service.professional.vendor_id))
     db.commit()
     return None
 
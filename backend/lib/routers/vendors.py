@@ -1,84 +1,162 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from lib.database import get_db
+from lib.database import get_db, get_read_db, get_async_read_db, run_in_session
 from lib.models.user import User
 from lib.models.vendor import Vendor
 from lib.models.professional import Professional
-from lib.models.service import Service
 from lib.schemas.vendor import (
     VendorProfileSetup,
     VendorProfileUpdate,
     VendorResponse,
     VendorDetailResponse,
     VendorWithProfessionals,
-    VendorListItem
+    VendorListItem,
+    NearbyVendorItem
 )
 from lib.schemas.professional import ProfessionalListItem
-from lib.auth import get_current_vendor_user, get_current_user
+from lib.auth import get_current_vendor_user, get_current_user, current_vendor
 from lib.cloudinary import upload_image, delete_image
+from lib.search import apply_vendor_search, reindex_vendor
+from lib.geo_utils import geo_cell, cells_covering, haversine_km
+from lib.vendor_cards import refresh_vendor_card, category_slug_filter
+from lib.models.vendor_card import VendorCard
+from lib.cache import cached_response, invalidate_on_commit, vendor_tag
+from lib.category_registry import get_category_registry
 import re
 
 router = APIRouter()
 
-# Get all active vendors (public)
+# Largest radius accepted by the nearby search
+MAX_NEARBY_RADIUS_KM = 50
+
+def vendor_card_item(card: VendorCard) -> dict:
+    """Format a vendor card for VendorListItem"""
+    return {
+        "id": card.vendor_id,
+        "business_name": card.business_name,
+        "location": card.location,
+        "rating": card.rating,
+        "review_count": card.review_count,
+        "is_pro": card.is_pro,
+        "avatar_url": card.avatar_url,
+        "total_professionals": card.total_professionals,
+        "min_price": card.min_price,
+        "max_price": card.max_price
+    }
+
+def list_vendor_cards(
+    location: Optional[str],
+    category_slug: Optional[str],
+    search: Optional[str],
+    sort: Optional[str],
+    limit: int,
+    offset: int,
+    db: Session
+) -> List[dict]:
+    """VendorListItem payloads for the marketplace listing (see get_vendors)"""
+    query = db.query(VendorCard).filter(VendorCard.is_active == True)
+    
+    # Location filter
+    if location:
+        query = query.filter(VendorCard.location.ilike(f"%{location}%"))
+    
+    # Category filter - vendors who have professionals with services in this category
+    if category_slug:
+        query = query.filter(category_slug_filter(category_slug))
+    
+    # Explicit sort first, so relevance only breaks ties
+    if sort == "rating":
+        query = query.order_by(VendorCard.rating.desc())
+    elif sort == "newest":
+        query = query.order_by(VendorCard.vendor_created_at.desc())
+    
+    # Search filter (ranked)
+    if search:
+        query = apply_vendor_search(query.join(Vendor, Vendor.id == VendorCard.vendor_id), search, db)
+    
+    cards = query.order_by(VendorCard.vendor_id).offset(offset).limit(limit).all()
+    
+    return [vendor_card_item(card) for card in cards]
+
+# Get all active vendors (public; async, served on the async engine)
 @router.get("/", response_model=List[VendorListItem])
-def get_vendors(
+async def get_vendors(
     location: Optional[str] = Query(None),
     category_slug: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    sort: Optional[str] = Query(None, pattern="^(rating|newest)$"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
-    Get all active vendors with optional filters:
+    Get active vendors with optional filters:
     - location: Filter by location (partial match)
     - category_slug: Filter vendors who offer services in this category
-    - search: Search in business name and bio
+    - search: Full-text search over business name, bio, location, specialties
+      and service names (prefix match on every word, ranked by relevance)
+    - sort: "rating" (highest first) or "newest"; search results otherwise
+      come back by relevance
+    - limit/offset: Page through results
+    
+    Served from the vendor_cards read model (one row per vendor, no joins
+    except the search document when searching).
     """
-    query = db.query(Vendor).filter(Vendor.is_active == True)
+    # Unknown categories can't match anything; no need to ask the database
+    if category_slug and not get_category_registry().by_slug(category_slug):
+        return []
     
-    # Location filter
-    if location:
-        query = query.filter(Vendor.location.ilike(f"%{location}%"))
+    return await run_in_session(db, list_vendor_cards, location, category_slug, search, sort, limit, offset)
+
+# Get vendors near a point, closest first (public)
+@router.get("/nearby", response_model=List[NearbyVendorItem])
+def get_nearby_vendors(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=MAX_NEARBY_RADIUS_KM),
+    category_slug: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Active vendors within radius_km of (lat, lng), sorted by distance
     
-    # Search filter
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Vendor.business_name.ilike(search_term)) | 
-            (Vendor.bio.ilike(search_term))
-        )
+    Candidates are prefiltered by the grid cells covering the search circle's
+    bounding box (indexed), then filtered and ranked by exact distance.
+    """
+    if category_slug and not get_category_registry().by_slug(category_slug):
+        return []
+    
+    query = db.query(VendorCard).filter(
+        VendorCard.is_active == True,
+        VendorCard.geo_cell.in_(cells_covering(lat, lng, radius_km))
+    )
     
-    # Category filter - vendors who have professionals with services in this category
     if category_slug:
-        from lib.models.service_category import ServiceCategory
-        query = query.join(Vendor.professionals).join(Professional.services).join(Service.category).filter(
-            ServiceCategory.slug == category_slug,
-            Professional.is_active == True,
-            Service.is_active == True
-        ).distinct()
+        query = query.filter(category_slug_filter(category_slug))
     
-    vendors = query.all()
+    nearby = []
+    for card in query.all():
+        distance = haversine_km(lat, lng, card.latitude, card.longitude)
+        if distance <= radius_km:
+            nearby.append((distance, card))
     
-    # Add avatar_url and total_professionals to response
-    result = []
-    for vendor in vendors:
-        user = db.query(User).filter(User.id == vendor.user_id).first()
-        result.append({
-            "id": vendor.id,
-            "business_name": vendor.business_name,
-            "location": vendor.location,
-            "rating": vendor.rating,
-            "is_pro": vendor.is_pro,
-            "avatar_url": user.avatar_url if user else None,
-            "total_professionals": vendor.total_professionals
-        })
+    nearby.sort(key=lambda item: (item[0], item[1].vendor_id))
     
-    return result
+    return [
+        {
+            **vendor_card_item(card),
+            "latitude": card.latitude,
+            "longitude": card.longitude,
+            "distance_km": round(distance, 2)
+        }
+        for distance, card in nearby[:limit]
+    ]
 
-# Get vendor by ID with professionals (public)
-@router.get("/{vendor_id}", response_model=VendorWithProfessionals)
-def get_vendor(vendor_id: int, db: Session = Depends(get_db)):
+def build_vendor_with_professionals(vendor_id: int, db: Session) -> dict:
+    """Load a vendor and its active professionals for VendorWithProfessionals"""
     vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
@@ -114,9 +192,8 @@ def get_vendor(vendor_id: int, db: Session = Depends(get_db)):
     
     return vendor_dict
 
-# Get vendor detail with contact info (public)
-@router.get("/{vendor_id}/detail", response_model=VendorDetailResponse)
-def get_vendor_detail(vendor_id: int, db: Session = Depends(get_db)):
+def build_vendor_detail(vendor_id: int, db: Session) -> dict:
+    """Load a vendor with its owner's contact info for VendorDetailResponse"""
     vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
@@ -133,16 +210,37 @@ def get_vendor_detail(vendor_id: int, db: Session = Depends(get_db)):
     
     return vendor_dict
 
+# Get vendor by ID with professionals (public, cached)
+# Cached routes read the primary: an invalidation that lands before the replica
+# catches up would otherwise be refilled with the old data until the TTL
+@router.get("/{vendor_id}", response_model=VendorWithProfessionals)
+def get_vendor(vendor_id: int, request: Request, db: Session = Depends(get_db)):
+    return cached_response(
+        request,
+        key=f"vendors:{vendor_id}",
+        tags=[vendor_tag(vendor_id)],
+        response_type=VendorWithProfessionals,
+        build=lambda: build_vendor_with_professionals(vendor_id, db)
+    )
+
+# Get vendor detail with contact info (public, cached)
+@router.get("/{vendor_id}/detail", response_model=VendorDetailResponse)
+def get_vendor_detail(vendor_id: int, request: Request, db: Session = Depends(get_db)):
+    return cached_response(
+        request,
+        key=f"vendors:{vendor_id}:detail",
+        tags=[vendor_tag(vendor_id)],
+        response_type=VendorDetailResponse,
+        build=lambda: build_vendor_detail(vendor_id, db)
+    )
+
 # Get current vendor's profile
 @router.get("/me/profile", response_model=VendorResponse)
 def get_my_profile(
     current_user: User = Depends(get_current_vendor_user),
+    vendor: Vendor = Depends(current_vendor),
     db: Session = Depends(get_db)
 ):
-    vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
-    if not vendor:
-        raise HTTPException(status_code=404, detail="Vendor profile not found")
-    
     # Add avatar_url from user
     vendor_dict = {
         **vendor.__dict__,
@@ -168,8 +266,14 @@ def setup_profile(
             existing.business_name = profile_data.business_name
             existing.bio = profile_data.bio
             existing.location = profile_data.location
+            existing.latitude = profile_data.latitude
+            existing.longitude = profile_data.longitude
+            existing.geo_cell = geo_cell(profile_data.latitude, profile_data.longitude)
             existing.is_active = True  # Activate the profile
             
+            reindex_vendor(existing.id, db)
+            refresh_vendor_card(existing.id, db)
+            invalidate_on_commit(db, vendor_tag(existing.id))
             db.commit()
             db.refresh(existing)
             
@@ -194,10 +298,15 @@ def setup_profile(
     vendor = Vendor(
         user_id=current_user.id,
         is_active=True,
+        geo_cell=geo_cell(profile_data.latitude, profile_data.longitude),
         **profile_data.model_dump()
     )
     
     db.add(vendor)
+    db.flush()
+    reindex_vendor(vendor.id, db)
+    refresh_vendor_card(vendor.id, db)
+    invalidate_on_commit(db, vendor_tag(vendor.id))
     db.commit()
     db.refresh(vendor)
     
@@ -210,17 +319,18 @@ def setup_profile(
 def update_profile(
     profile_data: VendorProfileUpdate,
     current_user: User = Depends(get_current_vendor_user),
+    vendor: Vendor = Depends(current_vendor),
     db: Session = Depends(get_db)
 ):
-    vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
-    if not vendor:
-        raise HTTPException(status_code=404, detail="Vendor profile not found")
-    
     # Update only provided fields
     update_data = profile_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(vendor, field, value)
+    vendor.geo_cell = geo_cell(vendor.latitude, vendor.longitude)
     
+    reindex_vendor(vendor.id, db)
+    refresh_vendor_card(vendor.id, db)
+    invalidate_on_commit(db, vendor_tag(vendor.id))
     db.commit()
     db.refresh(vendor)
     
@@ -259,6 +369,10 @@ async def upload_avatar(
         
         # Update user's avatar_url
         current_user.avatar_url = result['secure_url']
+        vendor = db.query(Vendor).filter(Vendor.user_id == current_user.id).first()
+        if vendor:
+            refresh_vendor_card(vendor.id, db)
+            invalidate_on_commit(db, vendor_tag(vendor.id))
         db.commit()
         
         return {
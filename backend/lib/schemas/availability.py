@@ -55,3 +55,36 @@ class AvailabilityResponse(BaseModel):
     professional_id: int  # CHANGED
     service_id: int
     slots: List[AvailabilitySlot]
+
+class AvailabilityDay(BaseModel):
+    """Available slots for one date within a range"""
+    date: date
+    slots: List[AvailabilitySlot]
+
+class AvailabilityRangeResponse(BaseModel):
+    """Available slots for every date in a range"""
+    start_date: date
+    end_date: date
+    professional_id: int
+    service_id: int
+    days: List[AvailabilityDay]
+
+class NextAvailableOpening(BaseModel):
+    """Earliest opening with one professional for a service"""
+    professional_id: int
+    professional_name: str
+    service_id: int
+    service_name: str
+    price: float
+    duration_minutes: int
+    date: date
+    start_time: time
+    end_time: time
+
+class NextAvailableResponse(BaseModel):
+    """Earliest openings across a vendor's team for a category"""
+    vendor_id: int
+    category_slug: str
+    start_date: date
+    end_date: date
+    openings: List[NextAvailableOpening]
@@ -84,6 +84,11 @@ class BookingResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class BookingPage(BaseModel):
+    """One page of booking history"""
+    items: List[BookingResponse]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
+
 class BookingListItem(BaseModel):
     """Minimal booking info for lists"""
     id: int
@@ -149,3 +154,21 @@ class CalendarResponse(BaseModel):
     end_date: date
     view_type: str  # "week" or "month"
     professionals: List[CalendarProfessional]
+
+class CalendarBookingChange(CalendarBooking):
+    """Booking changed since the sync watermark (includes cancelled/no-show so clients can drop them)"""
+    professional_id: int
+    updated_at: datetime
+
+class CalendarTimeBlockerChange(CalendarTimeBlocker):
+    """Time blocker created or deleted since the sync watermark"""
+    id: int
+    professional_id: int
+    deleted: bool = False
+
+class CalendarChangesResponse(BaseModel):
+    """Incremental calendar sync"""
+    since: datetime
+    watermark: datetime  # Pass back as ?since= on the next poll (trails now, so recent changes repeat)
+    bookings: List[CalendarBookingChange]
+    time_blockers: List[CalendarTimeBlockerChange]
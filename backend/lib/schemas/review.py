@@ -1,16 +1,16 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
 # ========== REQUEST MODELS ==========
 
 class ReviewCreate(BaseModel):
     booking_id: int
-    rating: int  # 1-5
+    rating: int = Field(..., ge=1, le=5)
     review_text: Optional[str] = None
 
 class ReviewUpdate(BaseModel):
-    rating: Optional[int] = None
+    rating: Optional[int] = Field(None, ge=1, le=5)
     review_text: Optional[str] = None
 
 # ========== RESPONSE MODELS ==========
@@ -60,6 +60,11 @@ class ReviewResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ReviewPage(BaseModel):
+    """One page of a review feed"""
+    items: List[ReviewResponse]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
+
 class ReviewSummary(BaseModel):
     """Summary of reviews for a professional or vendor"""
     average_rating: float
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from lib.schemas.professional import ProfessionalListItem
@@ -8,11 +8,15 @@ class VendorProfileSetup(BaseModel):
     business_name: str
     bio: Optional[str] = None
     location: str  # Google Places formatted address
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 class VendorProfileUpdate(BaseModel):
     business_name: Optional[str] = None
     bio: Optional[str] = None
     location: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     avatar_url: Optional[str] = None
 
 # Response schemas
@@ -21,6 +25,8 @@ class VendorBase(BaseModel):
     business_name: str
     bio: Optional[str] = None
     location: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     rating: float
     is_pro: bool
     is_active: bool
@@ -52,9 +58,18 @@ class VendorListItem(BaseModel):
     business_name: str
     location: Optional[str] = None
     rating: float
+    review_count: int = 0
     is_pro: bool
     avatar_url: Optional[str] = None
     total_professionals: int
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
     
     class Config:
         from_attributes = True
+
+class NearbyVendorItem(VendorListItem):
+    """Vendor list item with distance from the search point"""
+    latitude: float
+    longitude: float
+    distance_km: float
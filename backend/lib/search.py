@@ -0,0 +1,195 @@
+"""
+Vendor full-text search
+
+Each vendor carries a denormalized search_document (business name, bio,
+location, active professionals' specialties and active service names) that is
+refreshed by reindex_vendor whenever one of those sources changes.
+
+On PostgreSQL the document is matched with a GIN-indexed tsvector and ranked
+with ts_rank. Other databases (SQLite in development) fall back to an
+in-process inverted index kept in sync on commit.
+"""
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, List
+from sqlalchemy import event, func, case, literal_column, false
+from sqlalchemy.orm import Session
+from lib.database import SessionLocal
+from lib.models.vendor import Vendor
+from lib.models.professional import Professional
+from lib.models.service import Service
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Text search configuration: no stemming, so prefixes behave the same as the fallback
+TS_CONFIG = literal_column("'simple'")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens (letters, digits, underscore; any script)"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def search_vector():
+    """tsvector expression over Vendor.search_document (matches the GIN index)"""
+    return func.to_tsvector(TS_CONFIG, func.coalesce(Vendor.search_document, ""))
+
+class VendorSearchIndex:
+    """Inverted index of vendor search documents with prefix lookup and tf ranking"""
+
+    def __init__(self):
+        self._postings = defaultdict(dict)  # token -> {vendor_id: term frequency}
+        self._tokens_by_vendor = {}
+        self._sorted_tokens = []
+        self._lock = Lock()
+        self.loaded = False
+
+    def load(self, documents: Dict[int, str]):
+        """Replace the index contents with {vendor_id: document}"""
+        with self._lock:
+            self._postings.clear()
+            self._tokens_by_vendor.clear()
+            for vendor_id, document in documents.items():
+                self._add(vendor_id, document)
+            self._sorted_tokens = sorted(self._postings)
+            self.loaded = True
+
+    def update(self, vendor_id: int, document: str):
+        """Re-index one vendor's document"""
+        with self._lock:
+            self._remove(vendor_id)
+            self._add(vendor_id, document)
+            self._sorted_tokens = sorted(self._postings)
+
+    def search(self, query: str) -> List[int]:
+        """
+        Vendor ids matching every query token as a prefix, best first
+
+        Score is the summed term frequency of matched tokens, with exact token
+        matches weighted above prefix matches.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            scores = None
+            for term in terms:
+                term_scores = defaultdict(float)
+                position = bisect_left(self._sorted_tokens, term)
+                while position < len(self._sorted_tokens) and self._sorted_tokens[position].startswith(term):
+                    token = self._sorted_tokens[position]
+                    weight = 1.0 if token == term else 0.5
+                    for vendor_id, frequency in self._postings[token].items():
+                        term_scores[vendor_id] += frequency * weight
+                    position += 1
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {v: s + term_scores[v] for v, s in scores.items() if v in term_scores}
+                if not scores:
+                    return []
+
+        return sorted(scores, key=lambda v: (-scores[v], v))
+
+    def _add(self, vendor_id: int, document: str):
+        frequencies = defaultdict(int)
+        for token in tokenize(document):
+            frequencies[token] += 1
+        for token, frequency in frequencies.items():
+            self._postings[token][vendor_id] = frequency
+        self._tokens_by_vendor[vendor_id] = set(frequencies)
+
+    def _remove(self, vendor_id: int):
+        for token in self._tokens_by_vendor.pop(vendor_id, set()):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(vendor_id, None)
+                if not postings:
+                    del self._postings[token]
+
+_index = VendorSearchIndex()
+
+def get_search_index() -> VendorSearchIndex:
+    """Return the in-process fallback index"""
+    return _index
+
+def build_search_document(vendor: Vendor, db: Session) -> str:
+    """Concatenate the searchable text for a vendor"""
+    parts = [vendor.business_name, vendor.bio, vendor.location]
+
+    specialties = db.query(Professional.specialty).filter(
+        Professional.vendor_id == vendor.id,
+        Professional.is_active == True,
+        Professional.specialty.isnot(None)
+    ).all()
+    parts.extend(s for (s,) in specialties)
+
+    service_names = db.query(Service.name).join(Professional).filter(
+        Professional.vendor_id == vendor.id,
+        Professional.is_active == True,
+        Service.is_active == True
+    ).all()
+    parts.extend(n for (n,) in service_names)
+
+    return " ".join(p for p in parts if p)
+
+def reindex_vendor(vendor_id: int, db: Session):
+    """
+    Refresh a vendor's search document after its profile, professionals or services change
+
+    Call before db.commit(); the document is written in the same transaction and
+    the in-process index picks it up once the transaction commits.
+    """
+    db.flush()
+    vendor = db.query(Vendor).filter(Vendor.id == vendor_id).first()
+    if not vendor:
+        return
+
+    vendor.search_document = build_search_document(vendor, db)
+    db.info.setdefault("search_reindexed", {})[vendor.id] = vendor.search_document
+
+def rebuild_search_index(db: Session):
+    """Recompute every vendor's search document (data migration; the caller commits)"""
+    reindexed = db.info.setdefault("search_reindexed", {})
+    for vendor in db.query(Vendor).all():
+        vendor.search_document = build_search_document(vendor, db)
+        reindexed[vendor.id] = vendor.search_document
+    db.flush()
+
+def apply_vendor_search(query, search: str, db: Session):
+    """
+    Filter a Vendor query to search matches, ordered by relevance
+
+    Every query token must match a document token as a prefix.
+    """
+    terms = tokenize(search)
+    if not terms:
+        return query
+
+    if db.get_bind().dialect.name == "postgresql":
+        ts_query = func.to_tsquery(TS_CONFIG, " & ".join(f"{term}:*" for term in terms))
+        return query.filter(search_vector().op("@@")(ts_query)).order_by(
+            func.ts_rank(search_vector(), ts_query).desc(), Vendor.id
+        )
+
+    if not _index.loaded:
+        _index.load(dict(db.query(Vendor.id, Vendor.search_document).all()))
+
+    vendor_ids = _index.search(search)
+    if not vendor_ids:
+        return query.filter(false())
+
+    ranks = {vendor_id: rank for rank, vendor_id in enumerate(vendor_ids)}
+    return query.filter(Vendor.id.in_(vendor_ids)).order_by(case(ranks, value=Vendor.id))
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_reindexed(session):
+    for vendor_id, document in session.info.pop("search_reindexed", {}).items():
+        if _index.loaded:
+            _index.update(vendor_id, document)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_reindexed(session):
+    session.info.pop("search_reindexed", None)
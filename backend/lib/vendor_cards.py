@@ -0,0 +1,78 @@
+"""
+Maintenance of the vendor_cards read model
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from lib.models.user import User
+from lib.models.vendor import Vendor
+from lib.models.professional import Professional
+from lib.models.service import Service
+from lib.category_registry import get_category_registry
+from lib.models.vendor_card import VendorCard
+
+def category_slugs_value(slugs) -> str:
+    """Encode category slugs for VendorCard.category_slugs (sorted, comma-delimited on both ends)"""
+    return "," + "".join(f"{slug}," for slug in sorted(set(slugs)))
+
+def category_slug_filter(slug: str):
+    """Filter matching cards that offer a category"""
+    return VendorCard.category_slugs.like(f"%,{slug},%")
+
+def refresh_vendor_card(vendor_id: int, db: Session):
+    """
+    Rebuild one vendor's card from the vendor, its owner user, professionals and services
+    
+    Call before db.commit() so the card changes in the same transaction as its sources.
+    """
+    db.flush()
+    # populate_existing: rating aggregates may have been bumped by a bulk UPDATE in this transaction
+    vendor = db.query(Vendor).populate_existing().filter(Vendor.id == vendor_id).first()
+    if not vendor:
+        return
+    
+    avatar_url = db.query(User.avatar_url).filter(User.id == vendor.user_id).scalar()
+    
+    total_professionals = db.query(func.count(Professional.id)).filter(
+        Professional.vendor_id == vendor_id,
+        Professional.is_active == True
+    ).scalar()
+    
+    # Active services of active professionals
+    services = db.query(Service.price, Service.category_id).join(
+        Professional, Professional.id == Service.professional_id
+    ).filter(
+        Professional.vendor_id == vendor_id,
+        Professional.is_active == True,
+        Service.is_active == True
+    ).all()
+    prices = [price for price, _ in services if price is not None]
+    
+    card = db.query(VendorCard).filter(VendorCard.vendor_id == vendor_id).first()
+    if not card:
+        card = VendorCard(vendor_id=vendor_id)
+        db.add(card)
+    
+    card.business_name = vendor.business_name
+    card.avatar_url = avatar_url
+    card.location = vendor.location
+    card.latitude = vendor.latitude
+    card.longitude = vendor.longitude
+    card.geo_cell = vendor.geo_cell
+    card.rating = vendor.rating or 0.0
+    card.review_count = vendor.rating_count or 0
+    card.is_pro = bool(vendor.is_pro)
+    card.is_active = bool(vendor.is_active)
+    card.total_professionals = total_professionals
+    registry = get_category_registry()
+    card.category_slugs = category_slugs_value(
+        registry.slug_for(category_id) for _, category_id in services if registry.get(category_id)
+    )
+    card.min_price = min(prices) if prices else None
+    card.max_price = max(prices) if prices else None
+    card.vendor_created_at = vendor.created_at
+
+def rebuild_vendor_cards(db: Session):
+    """Rebuild every vendor's card (data migration; the caller commits)"""
+    for (vendor_id,) in db.query(Vendor.id).all():
+        refresh_vendor_card(vendor_id, db)
+    db.flush()
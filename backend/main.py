@@ -1,6 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import os
+from lib.category_registry import load_category_registry
+from lib.data_migrations import run_data_migrations
+from lib.db_pool import render_metrics
 
 # Import your routers
 from lib.routers import (
@@ -48,6 +52,14 @@ app.include_router(reviews.router, prefix="/api/reviews", tags=["Reviews"])
 app.include_router(service_categories.router, prefix="/api/categories", tags=["Categories"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 app.include_router(professionals.router, prefix="/api/professionals", tags=["Professionals"])
+
+@app.on_event("startup")
+def load_categories():
+    # Seed default categories and build the in-process registry once
+    load_category_registry()
+    # Backfill data for columns/tables added since the last deploy
+    run_data_migrations()
+
 @app.get("/")
 def read_root():
     return {
@@ -60,5 +72,10 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+# Connection pool telemetry (Prometheus text format)
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # For Railway/Render - they look for 'app'
 # No Mangum needed - Railway runs it as a real server
\ No newline at end of file
@@ -11,7 +11,9 @@ export default function CustomerBookings() {
   const { user, logout, loading: authLoading } = useAuth();
   const router = useRouter();
   const [bookings, setBookings] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [editingBooking, setEditingBooking] = useState(null);
   const [editNotes, setEditNotes] = useState('');
   const [reviewingBooking, setReviewingBooking] = useState(null);
@@ -30,24 +32,28 @@ export default function CustomerBookings() {
     }
   }, [user, authLoading]);
 
+  // Check which completed bookings have reviews
+  const loadReviewChecks = async (items) => {
+    const reviewChecks = {};
+    for (const booking of items) {
+      if (booking.status === 'completed') {
+        try {
+          const review = await reviewsAPI.getBookingReview(booking.id);
+          reviewChecks[booking.id] = review;
+        } catch (error) {
+          reviewChecks[booking.id] = null;
+        }
+      }
+    }
+    return reviewChecks;
+  };
+
   const loadBookings = async () => {
     try {
       const data = await bookingsAPI.getCustomerBookings();
-      setBookings(data);
-      
-      // Check which bookings have reviews
-      const reviewChecks = {};
-      for (const booking of data) {
-        if (booking.status === 'completed') {
-          try {
-            const review = await reviewsAPI.getBookingReview(booking.id);
-            reviewChecks[booking.id] = review;
-          } catch (error) {
-            reviewChecks[booking.id] = null;
-          }
-        }
-      }
-      setBookingReviews(reviewChecks);
+      setBookings(data.items);
+      setNextCursor(data.next_cursor);
+      setBookingReviews(await loadReviewChecks(data.items));
     } catch (error) {
       console.error('Error loading bookings:', error);
     } finally {
@@ -55,6 +61,21 @@ export default function CustomerBookings() {
     }
   };
 
+  const loadMoreBookings = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await bookingsAPI.getCustomerBookings({ cursor: nextCursor });
+      setBookings((prev) => [...prev, ...data.items]);
+      setNextCursor(data.next_cursor);
+      const reviewChecks = await loadReviewChecks(data.items);
+      setBookingReviews((prev) => ({ ...prev, ...reviewChecks }));
+    } catch (error) {
+      console.error('Error loading more bookings:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleCancelBooking = async (bookingId) => {
     if (!confirm('Are you sure you want to cancel this booking?')) return;
 
@@ -413,6 +434,19 @@ export default function CustomerBookings() {
                 ))}
               </div>
             )}
+
+            {/* Older bookings are fetched a page at a time */}
+            {nextCursor && (
+              <div className="text-center mt-6">
+                <button
+                  onClick={loadMoreBookings}
+                  disabled={loadingMore}
+                  className="px-6 py-2 rounded-lg border border-neutral-300 text-neutral-700 hover:bg-neutral-100 disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading...' : 'Load older bookings'}
+                </button>
+              </div>
+            )}
           </div>
         </main>
 
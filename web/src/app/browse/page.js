@@ -5,6 +5,9 @@ import { vendorsAPI, servicesAPI, reviewsAPI, categoriesAPI } from '@/lib/api';
 import { useRouter } from 'next/navigation';
 import Link from 'next/link';
 
+// Vendors fetched per request; "Load more" asks for the next page
+const PAGE_SIZE = 50;
+
 export default function Browse() {
   const { user, logout } = useAuth();
   const router = useRouter();
@@ -14,6 +17,9 @@ export default function Browse() {
   const [categories, setCategories] = useState([]);
   const [loading, setLoading] = useState(false);
   const [hasSearched, setHasSearched] = useState(false);
+  const [activeFilters, setActiveFilters] = useState({});
+  const [hasMore, setHasMore] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   
   // Search filters
   const [location, setLocation] = useState('');
@@ -33,6 +39,35 @@ export default function Browse() {
     }
   };
 
+  // Services and review counts for the vendor cards
+  const loadVendorDetails = async (vendorList) => {
+    const servicesPromises = vendorList.map(vendor => 
+      servicesAPI.getVendorServices(vendor.id)
+        .then(services => ({ vendorId: vendor.id, services }))
+        .catch(() => ({ vendorId: vendor.id, services: [] }))
+    );
+    
+    const servicesResults = await Promise.all(servicesPromises);
+    const servicesMap = {};
+    servicesResults.forEach(({ vendorId, services }) => {
+      servicesMap[vendorId] = services;
+    });
+    
+    const reviewPromises = vendorList.map(vendor =>
+      reviewsAPI.getVendorSummary(vendor.id)
+        .then(summary => ({ vendorId: vendor.id, count: summary.total_reviews }))
+        .catch(() => ({ vendorId: vendor.id, count: 0 }))
+    );
+    
+    const reviewResults = await Promise.all(reviewPromises);
+    const reviewCountsMap = {};
+    reviewResults.forEach(({ vendorId, count }) => {
+      reviewCountsMap[vendorId] = count;
+    });
+    
+    return { servicesMap, reviewCountsMap };
+  };
+
   const handleSearch = async () => {
     setLoading(true);
     setHasSearched(true);
@@ -44,36 +79,14 @@ export default function Browse() {
       if (selectedCategory) filters.category_slug = selectedCategory;
       if (searchText.trim()) filters.search = searchText.trim();
       
-      // Backend filtering
-      const data = await vendorsAPI.getAll(filters);
+      // Backend filtering, first page only
+      const data = await vendorsAPI.getAll({ ...filters, limit: PAGE_SIZE, offset: 0 });
       setVendors(data);
+      setActiveFilters(filters);
+      setHasMore(data.length === PAGE_SIZE);
       
-      // Load services for each vendor
-      const servicesPromises = data.map(vendor => 
-        servicesAPI.getVendorServices(vendor.id)
-          .then(services => ({ vendorId: vendor.id, services }))
-          .catch(() => ({ vendorId: vendor.id, services: [] }))
-      );
-      
-      const servicesResults = await Promise.all(servicesPromises);
-      const servicesMap = {};
-      servicesResults.forEach(({ vendorId, services }) => {
-        servicesMap[vendorId] = services;
-      });
+      const { servicesMap, reviewCountsMap } = await loadVendorDetails(data);
       setVendorServices(servicesMap);
-      
-      // Load review counts
-      const reviewPromises = data.map(vendor =>
-        reviewsAPI.getVendorSummary(vendor.id)
-          .then(summary => ({ vendorId: vendor.id, count: summary.total_reviews }))
-          .catch(() => ({ vendorId: vendor.id, count: 0 }))
-      );
-      
-      const reviewResults = await Promise.all(reviewPromises);
-      const reviewCountsMap = {};
-      reviewResults.forEach(({ vendorId, count }) => {
-        reviewCountsMap[vendorId] = count;
-      });
       setVendorReviewCounts(reviewCountsMap);
     } catch (error) {
       console.error('Error searching vendors:', error);
@@ -82,6 +95,24 @@ export default function Browse() {
     }
   };
 
+  // Next page for the last search (same filters, even if the inputs changed since)
+  const loadMoreVendors = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await vendorsAPI.getAll({ ...activeFilters, limit: PAGE_SIZE, offset: vendors.length });
+      setVendors((prev) => [...prev, ...data]);
+      setHasMore(data.length === PAGE_SIZE);
+      
+      const { servicesMap, reviewCountsMap } = await loadVendorDetails(data);
+      setVendorServices((prev) => ({ ...prev, ...servicesMap }));
+      setVendorReviewCounts((prev) => ({ ...prev, ...reviewCountsMap }));
+    } catch (error) {
+      console.error('Error loading more vendors:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleKeyPress = (e) => {
     if (e.key === 'Enter') {
       handleSearch();
@@ -266,7 +297,7 @@ export default function Browse() {
             {/* Results Header */}
             <div className="mb-8">
               <h2 className="text-3xl font-serif text-neutral-900 mb-2">
-                Found {vendors.length} {vendors.length === 1 ? 'Professional' : 'Professionals'}
+                Found {vendors.length}{hasMore ? '+' : ''} {vendors.length === 1 ? 'Professional' : 'Professionals'}
               </h2>
               {location && (
                 <p className="text-lg text-neutral-600">
@@ -373,6 +404,19 @@ export default function Browse() {
                 );
               })}
             </div>
+
+            {/* Further results are fetched a page at a time */}
+            {hasMore && (
+              <div className="text-center mt-10">
+                <button
+                  onClick={loadMoreVendors}
+                  disabled={loadingMore}
+                  className="px-7 py-3 rounded-full border border-primary-300 text-neutral-700 hover:bg-primary-100 font-medium transition disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              </div>
+            )}
           </>
         )}
       </main>
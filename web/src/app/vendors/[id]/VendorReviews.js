@@ -5,7 +5,9 @@ import { reviewsAPI } from '@/lib/api';
 export default function VendorReviews({ vendorId }) {
   const [reviews, setReviews] = useState([]);
   const [summary, setSummary] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     loadReviews();
@@ -15,7 +17,8 @@ export default function VendorReviews({ vendorId }) {
   const loadReviews = async () => {
     try {
       const data = await reviewsAPI.getVendorReviews(vendorId);
-      setReviews(data);
+      setReviews(data.items);
+      setNextCursor(data.next_cursor);
     } catch (error) {
       console.error('Error loading reviews:', error);
     } finally {
@@ -23,6 +26,19 @@ export default function VendorReviews({ vendorId }) {
     }
   };
 
+  const loadMoreReviews = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await reviewsAPI.getVendorReviews(vendorId, { cursor: nextCursor });
+      setReviews((prev) => [...prev, ...data.items]);
+      setNextCursor(data.next_cursor);
+    } catch (error) {
+      console.error('Error loading more reviews:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const loadSummary = async () => {
     try {
       const data = await reviewsAPI.getVendorSummary(vendorId);
@@ -156,6 +172,18 @@ export default function VendorReviews({ vendorId }) {
               </div>
             ))}
           </div>
+
+          {nextCursor && (
+            <div className="text-center mt-6">
+              <button
+                onClick={loadMoreReviews}
+                disabled={loadingMore}
+                className="px-6 py-2 rounded-lg border border-primary-300 text-neutral-700 hover:bg-primary-50 disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load more reviews'}
+              </button>
+            </div>
+          )}
         </>
       ) : (
         <div className="bg-primary-50 rounded-lg p-12 text-center border border-primary-200">
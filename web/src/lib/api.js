@@ -82,6 +82,7 @@ export const analyticsAPI = {
 // ========== VENDORS ==========
 export const vendorsAPI = {
   getAll: (params) => api.get('/api/vendors', { params }).then(res => res.data),
+  getNearby: (params) => api.get('/api/vendors/nearby', { params }).then(res => res.data),
   getById: (id) => api.get(`/api/vendors/${id}`).then(res => res.data),
   getMyProfile: () => api.get('/api/vendors/me/profile').then(res => res.data),
   setupProfile: (data) => api.post('/api/vendors/me/profile', data).then(res => res.data),
@@ -151,8 +152,9 @@ export const availabilityAPI = {
 // ========== BOOKINGS ==========
 export const bookingsAPI = {
   createBooking: (data) => api.post('/api/bookings', data).then(res => res.data),
-  getCustomerBookings: () => api.get('/api/bookings/me/customer').then(res => res.data),
-  getProfessionalBookings: () => api.get('/api/bookings/me/professional').then(res => res.data),
+  // Paginated: returns { items, next_cursor }; pass { cursor: next_cursor } for the next page
+  getCustomerBookings: (params) => api.get('/api/bookings/me/customer', { params }).then(res => res.data),
+  getProfessionalBookings: (params) => api.get('/api/bookings/me/professional', { params }).then(res => res.data),
   getBooking: (id) => api.get(`/api/bookings/${id}`).then(res => res.data),
   updateBooking: (id, data) => api.put(`/api/bookings/${id}`, data).then(res => res.data),
   cancelBooking: (id, reason) => api.post(`/api/bookings/${id}/cancel`, { reason }).then(res => res.data),
@@ -167,11 +169,11 @@ export const bookingsAPI = {
 export const reviewsAPI = {
   createReview: (data) => api.post('/api/reviews', data).then(res => res.data),
   updateReview: (id, data) => api.put(`/api/reviews/${id}`, data).then(res => res.data),
-  getProfessionalReviews: (professionalId) => api.get(`/api/reviews/professional/${professionalId}`).then(res => res.data),
-  getVendorReviews: (vendorId) => api.get(`/api/reviews/vendor/${vendorId}`).then(res => res.data),
+  getProfessionalReviews: (professionalId, params) => api.get(`/api/reviews/professional/${professionalId}`, { params }).then(res => res.data),
+  getVendorReviews: (vendorId, params) => api.get(`/api/reviews/vendor/${vendorId}`, { params }).then(res => res.data),
   getProfessionalSummary: (professionalId) => api.get(`/api/reviews/professional/${professionalId}/summary`).then(res => res.data),
   getVendorSummary: (vendorId) => api.get(`/api/reviews/vendor/${vendorId}/summary`).then(res => res.data),
-  getMyReviews: () => api.get('/api/reviews/my').then(res => res.data),
+  getMyReviews: (params) => api.get('/api/reviews/my', { params }).then(res => res.data),
   getBookingReview: (bookingId) => api.get(`/api/reviews/booking/${bookingId}`).then(res => res.data),
 };
 